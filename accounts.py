@@ -0,0 +1,130 @@
+import os
+import json
+import threading
+
+# 계정 블럭 ---------------------------------------------------------------------
+# 여러 115 계정을 설정하고, 새 작업을 받을 계정을 고릅니다. 첫 번째 계정이 기본 계정이며
+# 폴더 탐색/폴더 인덱스/폴더 검색은 기본 계정을 기준으로 합니다.
+#
+# 설정 (P115_ACCOUNTS 환경변수 또는 ACCOUNTS_FILE의 JSON 배열):
+#   [{"name": "main", "cookie": "...", "uid": "...", "folder_id": "123", "max_running": 50},
+#    {"name": "sub", "cookie": "...", "uid": "...", "folder_id": "456"}]
+#   name: 표시/선택용 이름 (없으면 account1, account2, ...)
+#   folder_id: 기본 계정이 아닌 계정에 작업을 배정할 때 사용할 저장 폴더 (기본 계정 외에는 필수, 기본 계정은 C_FolderId 대신 사용)
+#   max_running: 동시에 진행할 작업 수 한도 (없으면 ACCOUNT_MAX_RUNNING, 0이면 제한 없음)
+# 설정이 없으면 P115_COOKIE/UID/C_FolderId로 계정 하나를 만듭니다. (이전과 같은 동작)
+
+RUNNING_STATUSES = (0, 1)  # 115 오프라인 작업 상태: 대기, 다운로드 중
+
+
+class InvalidAccounts(ValueError):
+    """ 계정 설정이 JSON 배열이 아니거나 cookie/folder_id가 없거나 이름이 중복된 경우. """
+
+
+def parse_accounts(raw, default_max_running=0, require_cookie=True):
+    """ JSON 문자열 또는 리스트를 검증된 계정 설정 목록으로 변환합니다. """
+    accounts = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(accounts, list) or not accounts:
+        raise InvalidAccounts('Accounts must be a non-empty JSON array')
+
+    parsed = []
+    for i, account in enumerate(accounts):
+        if not isinstance(account, dict):
+            raise InvalidAccounts(f"Invalid account entry: {account}")
+        if require_cookie and not account.get('cookie'):
+            raise InvalidAccounts(f"Account {account.get('name') or i + 1} has no cookie")
+        if i > 0 and account.get('folder_id') is None:
+            raise InvalidAccounts(f"Account {account.get('name') or i + 1} has no folder_id")
+        try:
+            max_running = int(account.get('max_running', default_max_running) or 0)
+        except (TypeError, ValueError):
+            raise InvalidAccounts(f"Invalid max_running for account {account.get('name') or i + 1}")
+        parsed.append({
+            'name': str(account.get('name') or f"account{i + 1}"),
+            'cookie': account.get('cookie'),
+            'uid': account.get('uid'),
+            'folder_id': str(account['folder_id']) if account.get('folder_id') is not None else None,
+            'max_running': max_running,
+            'web_base': account.get('web_base'),  # 벤치마크 등에서 가짜 115 서버를 사용할 때만 지정
+            'webapi_base': account.get('webapi_base'),
+        })
+
+    names = [account['name'] for account in parsed]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise InvalidAccounts(f"Duplicate account names: {', '.join(duplicates)}")
+    return parsed
+
+
+def load_accounts(raw, file_path, fallback, default_max_running=0):
+    """ raw(환경변수) -> file_path(JSON 파일) -> fallback(단일 계정 설정) 순서로 계정 설정을 읽습니다. """
+    if raw:
+        return parse_accounts(raw, default_max_running)
+    if file_path and os.path.exists(file_path):
+        with open(file_path, 'r') as f:
+            return parse_accounts(json.load(f), default_max_running)
+    return parse_accounts([fallback], default_max_running, require_cookie=False)
+
+
+class Dispatcher:
+    """ 새 작업을 받을 계정을 고릅니다. 여유(남은 할당량과 max_running 중 작은 값)가 가장 많은 계정,
+        같으면 진행 중인 작업이 적은 계정, 그것도 같으면 설정 순서가 앞선 계정을 고릅니다.
+        마지막 스냅샷 이후 배정한 작업 수도 진행 중인 작업으로 계산하므로, 스냅샷이 갱신되기 전에
+        연달아 들어온 요청도 여러 계정에 나뉘어 배정됩니다. """
+
+    def __init__(self, accounts):
+        self.accounts = list(accounts)
+        self._limits = {account['name']: account['max_running'] for account in self.accounts}
+        self._running = {account['name']: 0 for account in self.accounts}
+        self._assigned = {account['name']: 0 for account in self.accounts}
+        self._quota = {account['name']: None for account in self.accounts}  # 115에서 조회한 남은 할당량 (모르면 None)
+        self._lock = threading.Lock()
+
+    def on_snapshot(self, old, new):
+        """ TaskPoller 리스너: 계정별 진행 중인 작업 수를 다시 세고, 배정 수를 초기화합니다. """
+        running = {name: 0 for name in self._running}
+        for task in new.upstream.values():
+            if task.get('status') in RUNNING_STATUSES and task.get('account') in running:
+                running[task['account']] += 1
+        with self._lock:
+            self._running = running
+            self._assigned = {name: 0 for name in self._assigned}
+
+    def update_quota(self, name, surplus):
+        with self._lock:
+            self._quota[name] = surplus
+
+    def _free(self, name):
+        """ 더 배정할 수 있는 작업 수. 한도를 모르면 None(제한 없음). """
+        limits = []
+        if self._limits[name]:
+            limits.append(self._limits[name] - self._running[name] - self._assigned[name])
+        if self._quota[name] is not None:
+            limits.append(self._quota[name] - self._assigned[name])
+        return min(limits) if limits else None
+
+    def choose(self, count=1):
+        """ count개의 작업을 받을 계정 이름을 고르고, 배정 수에 더합니다. """
+        with self._lock:
+            def rank(indexed):
+                i, account = indexed
+                free = self._free(account['name'])
+                return (-(float('inf') if free is None else free),
+                        self._running[account['name']] + self._assigned[account['name']], i)
+
+            _, best = min(enumerate(self.accounts), key=rank)
+            self._assigned[best['name']] += count
+            return best['name']
+
+    def state(self):
+        with self._lock:
+            return {
+                account['name']: {
+                    'running': self._running[account['name']],
+                    'assigned': self._assigned[account['name']],
+                    'max_running': self._limits[account['name']] or None,
+                    'quota': self._quota[account['name']],
+                    'free': self._free(account['name']),
+                }
+                for account in self.accounts
+            }
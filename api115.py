@@ -0,0 +1,127 @@
+import time
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import observe_upstream, upstream_retries
+
+# 115 웹 API 클라이언트 블럭 ----------------------------------------------------
+# p115 라이브러리가 제공하지 않는 웹 API(add_task_url(s), rb/delete)를 호출하는 공용 클라이언트.
+# Session으로 연결을 재사용(keep-alive)하고, 호출마다 연결/읽기 타임아웃을 적용하며,
+# 일시적인 오류는 지터가 있는 지수 백오프로 재시도하고, 115의 호출 제한에 맞춰 요청 속도를 조절합니다.
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36 Edg/127.0.0.0"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class Web115Error(Exception):
+    """ 115 웹 API 호출이 재시도 후에도 실패했거나 응답이 JSON이 아닌 경우. """
+
+
+class RateLimiter:
+    """ 토큰 버킷: 초당 rate개, 최대 burst개까지 몰아서 보낼 수 있습니다. """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Web115Client:
+    WEB_BASE = 'https://115.com'
+    WEBAPI_BASE = 'https://webapi.115.com'
+
+    def __init__(self, cookie, uid, connect_timeout=5, read_timeout=30, max_retries=3, backoff=0.5,
+                 rate=2.0, burst=4, pool_size=10, user_agent=DEFAULT_USER_AGENT, web_base=None, webapi_base=None):
+        self.uid = uid
+        self.WEB_BASE = (web_base or self.WEB_BASE).rstrip('/')
+        self.WEBAPI_BASE = (webapi_base or self.WEBAPI_BASE).rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(rate, burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Cookie': cookie or '', 'User-Agent': user_agent})
+
+    def request(self, method, url, op='request', timeout=None, **kwargs):
+        """ 속도 제한과 재시도를 적용해 요청을 보냅니다. 재시도 대상: 연결 오류, 타임아웃, 429/5xx. """
+        with observe_upstream(op):  # 지연 시간은 재시도와 속도 제한 대기를 포함
+            return self._request_with_retries(method, url, op, timeout, **kwargs)
+
+    def _request_with_retries(self, method, url, op, timeout, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                error = f"HTTP {response.status_code}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = str(e)
+
+            if attempt == self.max_retries:
+                raise Web115Error(f"{op} failed after {attempt + 1} attempts: {error}")
+            delay = random.uniform(0, self.backoff * (2 ** attempt))  # full jitter
+            logging.warning(f"{op} failed ({error}), retrying in {delay:.2f}s")
+            upstream_retries.inc(op=op)
+            time.sleep(delay)
+
+    def post_json(self, url, data, op='request', **kwargs):
+        response = self.request('POST', url, op=op, data=data, **kwargs)
+        try:
+            return response.json()
+        except ValueError:
+            raise Web115Error(f"{op} returned a non-JSON response: {response.text[:200]}")
+
+    # 오프라인 작업 추가 -----------------------------------------------------
+    def add_task_url(self, url, wp_path_id):
+        return self.post_json(
+            f"{self.WEB_BASE}/web/lixian/?ct=lixian&ac=add_task_url",
+            {'url': url, 'wp_path_id': wp_path_id, 'uid': self.uid},
+            op='add_task_url'
+        )
+
+    def add_task_urls(self, urls, wp_path_id):
+        """ 여러 링크를 url[0], url[1], ... 형식으로 한 번에 추가합니다. """
+        data = {'wp_path_id': wp_path_id, 'savepath': '', 'uid': self.uid}
+        data.update({f"url[{i}]": url for i, url in enumerate(urls)})
+        return self.post_json(
+            f"{self.WEB_BASE}/web/lixian/?ct=lixian&ac=add_task_urls", data, op='add_task_urls',
+            headers={'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8'}
+        )
+
+    def offline_quota(self):
+        """ 오프라인 다운로드 할당량. 응답의 surplus가 남은 횟수입니다. """
+        response = self.request('GET', f"{self.WEB_BASE}/web/lixian/?ct=lixian&ac=get_quota_package_info", op='offline_quota')
+        try:
+            return response.json()
+        except ValueError:
+            raise Web115Error(f"offline_quota returned a non-JSON response: {response.text[:200]}")
+
+    # 파일 삭제 ---------------------------------------------------------------
+    def delete_files(self, pid, file_ids):
+        """ pid 폴더 아래의 파일/폴더들을 fid[0], fid[1], ... 형식으로 한 번에 휴지통으로 보냅니다. """
+        data = {'pid': pid, 'ignore_warn': '1'}
+        data.update({f"fid[{i}]": file_id for i, file_id in enumerate(file_ids)})
+        return self.post_json(f"{self.WEBAPI_BASE}/rb/delete", data, op='rb_delete')
@@ -2,92 +2,222 @@ import os
 import logging
 import time
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, g
 from p115 import P115Client, P115Offline, P115FileSystem
-import requests
+from task_store import TaskStore
+from api115 import Web115Client, Web115Error
+from ingest import parse_links, plan_ingest, submit_in_chunks, chunked, extract_info_hash
+from folder_index import FolderIndex, normalize_path, folder_mtime
+from folder_search import FolderSearchIndex, FolderCrawler
+from task_poller import TaskPoller, make_snapshot, diff_snapshots, save_snapshot, load_snapshot
+from events import EventHub, format_sse, RESYNC
+from jobs import JobQueue, ThrottledError, QUEUED, RUNNING
+from retention import RetentionScheduler, parse_policies
+from history import HistoryArchive
+from accounts import load_accounts, Dispatcher
+from task_view import TaskView, InvalidQuery, FORMATS, to_columns
+from http_cache import negotiate_encoding, compress, query_hash, make_etag, EncodedBodyCache, MIN_COMPRESS_SIZE, COMPRESSIBLE_TYPES
+from warmup import LazyResource, WarmUp, UpstreamUnavailable
+from metrics import registry, Gauge, http_request_seconds, observe_upstream, record_cache, SamplingProfiler
 import json
-from urllib.parse import urlencode
+import zlib
+import queue
+import threading
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__)
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper()) # 작업/폴더별 상세 로그는 DEBUG에서만 출력
 
 # 환경변수에서 가져올 값들: 云下载 폴더 id, 115클라우드 cookie
 default_download_path_id = os.getenv('C_FolderId')
 cookie = os.getenv('P115_COOKIE')
 uid = os.getenv('UID')
+DATA_DIR = os.getenv('DATA_DIR', '/app/data') # 저장소, 인덱스, 스냅샷 파일을 둘 디렉토리
+
+# 계정 설정: P115_ACCOUNTS(JSON 배열) 또는 ACCOUNTS_FILE, 둘 다 없으면 위의 P115_COOKIE/UID/C_FolderId 계정 하나 (accounts.py 참고)
+ACCOUNTS_FILE = os.getenv('ACCOUNTS_FILE', os.path.join(DATA_DIR, 'accounts.json'))
+ACCOUNT_MAX_RUNNING = int(os.getenv('ACCOUNT_MAX_RUNNING', '0')) # 계정별 동시에 진행할 작업 수 한도 (0이면 제한 없음)
+ACCOUNT_CONFIGS = load_accounts(os.getenv('P115_ACCOUNTS'), ACCOUNTS_FILE,
+                                {'name': 'default', 'cookie': cookie, 'uid': uid, 'folder_id': default_download_path_id},
+                                ACCOUNT_MAX_RUNNING)
+ACCOUNT_CONFIGS[0]['folder_id'] = ACCOUNT_CONFIGS[0]['folder_id'] or default_download_path_id
+default_download_path_id = ACCOUNT_CONFIGS[0]['folder_id'] # 기본 계정(첫 번째)의 기본 다운로드 폴더
 
 # 클라이언트 및 서비스 객체 생성
-client = P115Client(cookie)
-offline_service = P115Offline(client)
-fs = P115FileSystem(client)
+# p115 클라이언트는 import 시점에 만들지 않고 warm-up(또는 처음 사용하는 요청)에서 계정마다 한 번만 생성합니다.
+# 쿠키 오류나 115 장애가 있어도 서버는 바로 시작하고, 저장된 스냅샷으로 응답합니다.
+P115_RETRY_INTERVAL = int(os.getenv('P115_RETRY_INTERVAL', '30')) # 클라이언트 생성 실패 후 다시 시도하기까지의 시간(초)
+P115Clients = namedtuple('P115Clients', ['client', 'offline', 'fs'])
+Account = namedtuple('Account', ['name', 'folder_id', 'clients', 'web'])
+
+def make_account(config):
+    def create_p115_clients():
+        with observe_upstream('p115_client_init'):
+            client = P115Client(config['cookie'])
+        return P115Clients(client, P115Offline(client), P115FileSystem(client))
+
+    web = Web115Client( # p115에 없는 웹 API(작업 추가, rb/delete, 할당량)용 계정별 공용 클라이언트
+        config['cookie'], config['uid'],
+        connect_timeout=float(os.getenv('API115_CONNECT_TIMEOUT', '5')),
+        read_timeout=float(os.getenv('API115_READ_TIMEOUT', '30')),
+        max_retries=int(os.getenv('API115_MAX_RETRIES', '3')),
+        rate=float(os.getenv('API115_RATE', '2')),  # 계정별 초당 요청 수
+        burst=int(os.getenv('API115_BURST', '4')),
+        web_base=config['web_base'] or os.getenv('API115_WEB_BASE'), # 벤치마크 등에서 가짜 115 서버를 사용할 때만 지정
+        webapi_base=config['webapi_base'] or os.getenv('API115_WEBAPI_BASE')
+    )
+    clients = LazyResource(f"p115 client ({config['name']})", create_p115_clients, retry_interval=P115_RETRY_INTERVAL)
+    return Account(config['name'], config['folder_id'], clients, web)
+
+accounts = {config['name']: make_account(config) for config in ACCOUNT_CONFIGS} # 설정 순서 유지
+primary_account = accounts[ACCOUNT_CONFIGS[0]['name']] # 폴더 탐색/인덱스/검색에 사용하는 기본 계정
+dispatcher = Dispatcher(ACCOUNT_CONFIGS) # 새 작업을 받을 계정 선택 (남은 할당량, 진행 중인 작업 수 기준)
+p115_clients = primary_account.clients
+
+def get_account(name=None):
+    """ 이름에 해당하는 계정. 이름이 없거나(이전 스냅샷의 작업 등) 모르는 계정이면 기본 계정. """
+    return accounts.get(name) or primary_account
+
+def get_offline_service(account=None):
+    return (account or primary_account).clients.get().offline
+
+def get_fs(account=None):
+    return (account or primary_account).clients.get().fs
 
 # 작업 목록을 저장할 딕셔너리
 tasks_created_times = {}
 tasks_completed_times = {}
 task_folder_mapping = {} # 필요한 딕셔너리를 추가하여 wp_path_id를 저장합니다.
-folder_id_to_name = {} # 폴더 ID와 이름 매핑을 저장할 딕셔너리
 
 # Task 저장 블럭-------------------------------------------------------------------
-TASK_TIMES_FILE = '/app/data/task_times.json' # 저장할 JSON 파일 경로 설정
-
-def load_task_times(): # 파일에서 task_times를 로드하는 함수
-    if os.path.exists(TASK_TIMES_FILE):
-        with open(TASK_TIMES_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+TASK_TIMES_FILE = os.path.join(DATA_DIR, 'task_times.json') # 이전 버전의 JSON 파일 경로 (최초 1회 마이그레이션용)
+TASK_DB_FILE = os.path.join(DATA_DIR, 'tasks.db') # info_hash를 키로 하는 SQLite 저장소 경로
+HISTORY_FILE = os.path.join(DATA_DIR, 'history.jsonl.gz') # 삭제/사라진 작업의 기록 보관소 (추가 전용, 압축)
+HISTORY_COMPACT_EVERY = int(os.getenv('HISTORY_COMPACT_EVERY', '50')) # 이 횟수만큼 기록을 덧붙이면 보관소를 정리(같은 기록 제거, 재압축)
+
+def make_history_record(task_id, stored, row, upstream_task, reason):
+    """ 저장소 레코드와 스냅샷 정보로 보관소에 남길 기록을 만듭니다. """
+    return {
+        'info_hash': task_id,
+        'name': upstream_task.get('name') or row.get('name'),
+        'folder_id': stored.get('folder_id') or upstream_task.get('wp_path_id'),
+        'folder_name': row.get('folder_name'),
+        'size': int(float(upstream_task.get('size') or 0)),
+        'created_time': stored.get('created_time'),
+        'completed_time': stored.get('completed_time'),
+        'removed_time': datetime.now().isoformat(),
+        'reason': reason,
+        'account': upstream_task.get('account') or row.get('account'),
+    }
 
-def save_task_times(task_times): # task_times를 JSON 파일에 저장하는 함수
-    existing_task_times = load_task_times() # 기존 파일의 내용을 로드합니다.
-    
-    for task_id, times in task_times.items(): # 새로운 task_times를 기존 task_times에 병합합니다.
-        if task_id not in existing_task_times: # 이미 존재하는 task_id에 대해서는 업데이트하지 않음
-            existing_task_times[task_id] = times
-    
-    with open(TASK_TIMES_FILE, 'w') as f: # 병합된 내용을 다시 저장합니다.
-        json.dump(existing_task_times, f, indent=4, default=str)
-
-def remove_task_time(task_id): # 특정 task_id를 JSON 파일에서 삭제하는 함수
-    task_times = load_task_times()
-    if task_id in task_times:
-        del task_times[task_id]
-        save_task_times(task_times)
-        
-# 폴더 매핑 블럭 -------------------------------------------------------------------    
-def build_folder_mapping(starting_path="/"):
-    """주어진 경로에 대한 폴더 매핑을 수행합니다. """
-    fs.chdir(starting_path)
-    folders = fs.dictdir()  # 폴더 ID와 이름의 딕셔너리 생성
-
-    for folder_id, folder_name in folders.items():
-        folder_id_to_name[str(folder_id)] = folder_name
-        logging.info(f"Folder ID: {folder_id}, Full Path: {folder_name}")
-
-    save_mapping_to_file()  # 매핑 데이터를 저장
-
-def explore_folder(folder_id):
-    """ 사용자가 탐색한 폴더의 서브디렉토리를 매핑합니다. """
-    if folder_id not in folder_id_to_name:
-        logging.warning(f"Folder ID {folder_id} not found in current mapping.")
+def archive_tasks(task_ids, stored_records, snapshot, reason):
+    """ 작업 기록을 보관소로 옮깁니다. (저장소에서의 삭제는 호출한 쪽에서 한 번에 수행) """
+    if not task_ids:
         return
-
-    current_path = folder_id_to_name[folder_id]
-    build_folder_mapping(current_path)
-    save_mapping_to_file() # 폴더 매핑 정보를 저장합니다.
-
-def get_full_folder_path(folder_id):
-    """ 주어진 폴더 ID에 대한 전체 경로를 반환합니다. """
-    return folder_id_to_name.get(folder_id, 'N/A')
-
-def save_mapping_to_file():
-    with open('/app/data/folder_mapping.json', 'w') as f:
-        json.dump(folder_id_to_name, f, indent=4)
-
-def load_mapping_from_file():
-    global folder_id_to_name
-    if os.path.exists('/app/data/folder_mapping.json'):
-        with open('/app/data/folder_mapping.json', 'r') as f:
-            folder_id_to_name = json.load(f)
-        logging.info("Folder mapping loaded from file.")
+    rows = {task['task_id']: task for task in snapshot.tasks}
+    records = [make_history_record(task_id, stored_records.get(task_id) or {}, rows.get(task_id, {}), snapshot.upstream.get(task_id, {}), reason)
+               for task_id in task_ids]
+    try:
+        history_archive.append(records)
+    except OSError as e:
+        logging.error(f"Error archiving {len(records)} task records: {e}")
+
+# 폴더 매핑 블럭 -------------------------------------------------------------------
+FOLDER_INDEX_FILE = os.path.join(DATA_DIR, 'folder_mapping.json') # 폴더 인덱스 저장 경로
+FOLDER_INDEX_TTL = int(os.getenv('FOLDER_INDEX_TTL', '600')) # 하위 폴더 목록 캐시 유지 시간(초)
+FOLDER_CRAWL_INTERVAL = int(os.getenv('FOLDER_CRAWL_INTERVAL', '3600')) # 전체 폴더 트리 크롤 주기(초), 0이면 사용 안 함
+FOLDER_CRAWL_CONCURRENCY = int(os.getenv('FOLDER_CRAWL_CONCURRENCY', '3')) # 크롤 시 동시에 조회할 폴더 수
+FOLDER_CRAWL_FULL_EVERY = int(os.getenv('FOLDER_CRAWL_FULL_EVERY', '24')) # 이 횟수마다 수정 시각과 관계없이 전체를 다시 조회 (0이면 안 함)
+UNRESOLVABLE_FOLDER_TTL = int(os.getenv('UNRESOLVABLE_FOLDER_TTL', '3600')) # 115에 없다고 확인된 폴더를 다시 조회하지 않는 시간(초)
+unresolvable_folders = {} # {(계정 이름, 폴더 ID): 만료 시각(monotonic)} 115에 없는 폴더 (매 조회마다 재시도하지 않음)
+
+def resolve_folder(folder_id):
+    """ 폴더 정보를 인덱스에서 찾고, 없을 때만 115에서 한 번 조회해 등록합니다. """
+    folder_id = str(folder_id)
+    node = folder_index.get(folder_id)
+    record_cache('folder_node', node is not None)
+    if node is None:
+        with observe_upstream('fs_attr'):
+            attr = get_fs().attr(int(folder_id))
+        folder_index.add_node(attr['id'], attr['name'], attr['parent_id'], attr.get('path'))
+        folder_index.save()
+        node = folder_index.get(folder_id)
+    return node
+
+def list_subfolders(folder_id, save=True, force=False):
+    """ 하위 폴더 목록을 인덱스에서 반환하고, 없거나 만료된 경우(force면 항상)에만 115에서 조회합니다.
+        save=False면 파일 저장을 호출한 쪽에 맡깁니다. (크롤러는 크롤이 끝날 때 한 번만 저장) """
+    folder_id = str(folder_id)
+    children = None if force else folder_index.children(folder_id)
+    if not force:
+        record_cache('folder_children', children is not None)
+    if children is None:
+        resolve_folder(folder_id)
+        with observe_upstream('fs_listdir_attr'):
+            attrs = get_fs().listdir_attr(int(folder_id))
+        folder_index.set_children(folder_id, [(attr['id'], attr['name'], folder_mtime(attr)) for attr in attrs if attr.get('is_directory')])
+        if save:
+            folder_index.save()
+        children = folder_index.children(folder_id)
+    return children
+
+def resolve_path(path):
+    """ 절대 경로에 해당하는 폴더 ID를 찾습니다. 인덱스에 없으면 루트부터 한 단계씩 하위 목록으로 찾습니다. """
+    path = normalize_path(path)
+    folder_id = folder_index.id_of(path)
+    if folder_id is not None:
+        return folder_id
+
+    folder_id = '0'
+    for name in path.strip('/').split('/'):
+        match = next((folder for folder in list_subfolders(folder_id) if folder['name'] == name), None)
+        if match is None:
+            raise FileNotFoundError(f"Folder not found: {path}")
+        folder_id = match['id']
+    return folder_id
+
+account_folder_paths = {} # {(계정 이름, 폴더 ID): 경로} 기본 계정이 아닌 계정의 폴더 경로 (폴더 인덱스는 기본 계정만 관리)
+
+def resolve_account_folder_path(account, folder_id):
+    """ 기본 계정이 아닌 계정의 폴더 경로를 그 계정의 클라이언트로 찾습니다. (다운로드 폴더 몇 개뿐이므로 메모리에만 보관) """
+    if folder_id == '0':
+        return '/'
+    key = (account.name, folder_id)
+    path = account_folder_paths.get(key)
+    record_cache('account_folder', path is not None)
+    if path is None:
+        with observe_upstream('fs_attr'):
+            attr = get_fs(account).attr(int(folder_id))
+        path = attr.get('path') or f"{resolve_account_folder_path(account, str(attr['parent_id'])).rstrip('/')}/{attr['name']}"
+        account_folder_paths[key] = path
+    return path
+
+def get_full_folder_path(folder_id, account=None):
+    """ 주어진 폴더 ID에 대한 전체 경로를 반환합니다. account가 기본 계정이 아니면 그 계정에서 찾습니다. """
+    folder_id = str(folder_id)
+    if not folder_id.isdigit():
+        return 'N/A'
+    key = ((account or primary_account).name, folder_id)
+    expires = unresolvable_folders.get(key)
+    if expires is not None:
+        if time.monotonic() < expires:
+            return 'N/A'
+        unresolvable_folders.pop(key, None)  # 만료되면 다시 조회
+    try:
+        if account is not None and account is not primary_account:
+            return resolve_account_folder_path(account, folder_id)
+        return resolve_folder(folder_id)['path']
+    except UpstreamUnavailable:
+        return 'N/A'  # 클라이언트가 준비되면 다시 조회
+    except FileNotFoundError as e:
+        logging.warning(f"Folder {folder_id} not found in account {key[0]}: {e}")
+        unresolvable_folders[key] = time.monotonic() + UNRESOLVABLE_FOLDER_TTL
+        return 'N/A'
+    except Exception as e:
+        logging.error(f"Error resolving folder path for ID {folder_id}: {e}")  # 타임아웃/5xx 등 일시적인 오류는 기억하지 않고 다음에 다시 조회
+        return 'N/A'
 
 def format_size(size):
     """ 파일 크기를 적절한 단위로 변환하는 헬퍼 함수. """
@@ -96,109 +226,415 @@ def format_size(size):
             return f"{size:.1f} {unit}"
         size /= 1024.0
         
+# 작업 목록 스냅샷 블럭 -------------------------------------------------------------
+TASK_POLL_INTERVAL = int(os.getenv('TASK_POLL_INTERVAL', '60')) # 115 작업 목록 조회 주기(초)
+SSE_HEARTBEAT = 15 # 이벤트가 없을 때 연결 유지를 위한 주석 전송 간격(초)
+
+def resolve_completed_times(pending):
+    """ 완료 시간이 없는 완료 작업들을 (계정, 다운로드 폴더)별로 묶어 폴더마다 한 번만 조회합니다.
+        pending: {task_id: (account, folder_id, target_name, fallback_time)} -> {task_id: datetime}
+        폴더에서 이름을 찾지 못한 작업은 fallback_time(115의 last_update)을 사용합니다. """
+    by_folder = {} # {(account, folder_id): {target_name: [task_id, ...]}}
+    for task_id, (account, folder_id, target_name, _) in pending.items():
+        by_folder.setdefault((account, str(folder_id)), {}).setdefault(target_name, []).append(task_id)
+
+    resolved = {}
+    for (account, folder_id), wanted in by_folder.items():
+        remaining = set(wanted)
+        if folder_id.isdigit():
+            try:
+                # 큰 폴더도 페이지 단위로 가져오며, 찾는 이름을 모두 찾으면 더 이상 페이지를 요청하지 않음
+                with observe_upstream('fs_iterdir'):
+                    for attr in get_fs(account).iterdir(int(folder_id)):
+                        if attr['name'] in remaining:
+                            for task_id in wanted[attr['name']]:
+                                resolved[task_id] = attr['etime']
+                            remaining.discard(attr['name'])
+                            if not remaining:
+                                break
+            except Exception as e:
+                logging.error(f"Error retrieving etime for folder {folder_id}: {e}")
+                continue  # 다음 조회 때 다시 시도
+        for target_name in remaining:
+            for task_id in wanted[target_name]:
+                resolved[task_id] = pending[task_id][3]
+    return resolved
+
+def list_account_tasks(account):
+    """ 한 계정의 작업 목록을 조회해 작업마다 계정 이름을 붙입니다. 계정이 여럿이면 배정에 쓸 할당량도 갱신합니다. """
+    with observe_upstream('offline_list'):
+        tasks = get_offline_service(account).list()
+    if len(accounts) > 1:
+        try:
+            dispatcher.update_quota(account.name, account.web.offline_quota().get('surplus'))
+        except Exception as e:
+            logging.warning(f"Error fetching offline quota for account {account.name}: {e}")
+    return [dict(task, account=account.name) for task in tasks]
+
+def list_all_tasks(previous):
+    """ 모든 계정의 작업 목록을 동시에 조회해 합치고, (작업 목록, 조회에 성공한 계정 이름 집합)을 반환합니다.
+        조회에 실패한 계정은 이전 스냅샷의 작업을 그대로 사용하고 다른 계정의 갱신은 계속됩니다.
+        (실패한 계정의 작업은 사라진 작업으로 보지 않도록 호출한 쪽에서 성공한 계정만 정리) 모든 계정이 실패하면 예외를 전달합니다. """
+    if len(accounts) == 1:
+        return list_account_tasks(primary_account), {primary_account.name}
+    with ThreadPoolExecutor(max_workers=len(accounts), thread_name_prefix='task-list') as executor:
+        futures = {name: executor.submit(list_account_tasks, account) for name, account in accounts.items()}
+    all_tasks = []
+    errors = []
+    listed = set()
+    for name, future in futures.items():
+        try:
+            all_tasks.extend(future.result())
+            listed.add(name)
+        except Exception as e:
+            logging.error(f"Error listing tasks for account {name}: {e}")
+            errors.append(e)
+            all_tasks.extend(task for task in previous.upstream.values() if task.get('account', primary_account.name) == name)
+    if len(errors) == len(futures):
+        raise errors[0]
+    return all_tasks, listed
+
+def build_task_snapshot(previous):
+    """ 115 작업 목록을 한 번 조회해 폴더명, 완료 시간 등을 붙인 새 스냅샷을 만듭니다. (폴러 스레드에서 실행) """
+    tasks = []
+    running_count = 0
+    complete_count = 0
+
+    task_times = task_store.get_all() # 목록 조회 전에 읽어, 조회 도중 추가된 작업이 사라진 작업으로 보이지 않도록 함
+    read_ids = set(task_times)
+    all_tasks, listed_accounts = list_all_tasks(previous) # 계정별로 동시에 조회해 합친 목록, 조회에 성공한 계정
+    updates = {} # 변경된 레코드만 모아 루프가 끝난 뒤 한 번에 저장
+    entries = [] # 완료 시간 조회 후 행을 만들기 위한 중간 결과
+    pending_completions = {} # 완료되었지만 완료 시간이 기록되지 않은 작업
+
+    for task in all_tasks:
+        task_id = task.get('info_hash', 'Unknown ID')
+
+        record_cache('task_record', task_id in task_times)
+        if task_id in task_times:
+            created_time = datetime.fromisoformat(task_times[task_id]['created_time'])
+            completed_time = task_times[task_id].get('completed_time')
+            original_size = task_times[task_id].get('original_size', None)
+            
+            if completed_time:
+                completed_time = datetime.fromisoformat(completed_time)
+        else:
+            created_time = datetime.fromtimestamp(task.get('add_time', 0))
+            completed_time = None
+            original_size = None
+
+        if original_size is None or original_size == "0.0 B":
+            original_size = format_size(task.get('size', 0))
+            task_times[task_id] = {
+                'created_time': created_time.isoformat(),
+                'original_size': original_size,
+                'folder_id': task.get('wp_path_id', 'N/A')
+            }
+
+            if completed_time:
+                task_times[task_id]['completed_time'] = completed_time.isoformat()
+            updates[task_id] = task_times[task_id]
+
+        account = get_account(task.get('account'))
+        if task_times[task_id].get('account') != account.name:
+            task_times[task_id]['account'] = account.name  # 사라진 작업을 계정별로 정리하기 위해 기록 (이전 레코드도 채움)
+            updates[task_id] = task_times[task_id]
+
+        folder_id = task_times[task_id].get('folder_id', 'N/A')
+        folder_name = get_full_folder_path(folder_id, account)  # 폴더 인덱스에서 경로를 찾음 (없을 때만 115 조회)
+
+        folder_path = task.get('del_path', '').strip('/')
+        target_name = folder_path.split('/')[-1]
+        is_complete = task.get('percentDone', 0) == 100
+
+        if is_complete and 'completed_time' not in task_times[task_id]:
+            # 완료 시간은 아래에서 폴더별로 묶어 한 번에 조회
+            pending_completions[task_id] = (account, folder_id, target_name, datetime.fromtimestamp(task.get('last_update', 0)))
+        entries.append((task, task_id, created_time, original_size, folder_id, folder_name, is_complete, account))
+
+    # 완료 시간 일괄 조회: 다운로드 폴더마다 한 번만 목록을 가져오고, 결과는 저장소에 기록하여 다시 조회하지 않음
+    for task_id, completed_time in resolve_completed_times(pending_completions).items():
+        task_times[task_id]['completed_time'] = completed_time.isoformat()
+        updates[task_id] = task_times[task_id]
+
+    for task, task_id, created_time, original_size, folder_id, folder_name, is_complete, account in entries:
+        completed_time = task_times[task_id].get('completed_time')
+        completed_time = datetime.fromisoformat(completed_time) if completed_time else None
+
+        if is_complete:
+            complete_count += 1
+        else:
+            running_count += 1
+
+        logging.debug(f"Task ID: {task_id}, Folder ID: {folder_id}, Mapped Folder Name: {folder_name}, Completed Time: {completed_time}")
+
+        task_info = {
+            'task_id': task_id,
+            'name': task.get('name', 'Unknown Name'),
+            'status': 'Complete' if is_complete else 'Running',
+            'created_time': created_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'completed_time': completed_time.strftime('%Y-%m-%d %H:%M:%S') if completed_time else '',
+            'size': original_size,
+            'percent': f"{task.get('percentDone', 0):.1f}",
+            'folder_name': folder_name,
+            'account': account.name
+        }
+        tasks.append(task_info)
+
+    upstream = {task.get('info_hash', 'Unknown ID'): task for task in all_tasks}
+
+    # 115 목록에서 사라진 작업(115에서 직접 삭제 등)은 보관소로 옮기고 저장소에서 제거 (저장소에는 살아있는 작업만 유지)
+    # 빈 목록은 115의 일시적인 오류일 수 있으므로 정리하지 않음. 조회에 성공한 계정의 작업만 정리하고,
+    # 계정이 기록되지 않은(또는 설정에서 빠진) 레코드는 모든 계정의 조회에 성공했을 때만 정리
+    all_listed = len(listed_accounts) == len(accounts)
+    gone_ids = [
+        task_id for task_id, record in task_times.items()
+        if task_id not in upstream and (record.get('account') in listed_accounts if record.get('account') in accounts else all_listed)
+    ] if all_tasks else []
+
+    with task_store.batch():
+        # 읽은 뒤 조회하는 사이에 삭제(delete_tasks)된 작업은 되살리지 않고, 이미 보관소로 옮겨졌으므로 다시 보관하지 않음
+        read_updates = [task_id for task_id in updates if task_id in read_ids]
+        still_stored = task_store.get_many(read_updates) if read_updates else {}
+        updates = {task_id: times for task_id, times in updates.items() if task_id not in read_ids or task_id in still_stored}
+        if updates:
+            task_store.upsert_many(updates)
+        gone_ids = task_store.delete_many(gone_ids) if gone_ids else []  # 이 조회에서 실제로 삭제한 작업만 보관
+    archive_tasks(gone_ids, task_times, previous, 'disappeared')
+
+    if previous.version and tuple(tasks) == previous.tasks and (running_count, complete_count) == (previous.running_count, previous.complete_count):
+        # 바뀐 작업이 없으면 version과 직렬화된 본문을 그대로 사용 (ETag가 유지되어 /tasks는 304로 응답)
+        return previous._replace(upstream=upstream, updated_at=time.time())
+    return make_snapshot(previous.version + 1, tasks, running_count, complete_count, upstream)
+
+def publish_task_delta(old, new):
+    """ 이전 스냅샷과 달라진 작업만 /tasks/stream 구독자에게 전송합니다. """
+    delta = diff_snapshots(old, new)
+    if delta['changed'] or delta['removed'] or old.running_count != new.running_count or old.complete_count != new.complete_count:
+        event_hub.publish('delta', json.dumps(delta, ensure_ascii=False, default=str), new.version)
+
+def persist_task_snapshot(old, new):
+    """ 재시작 직후에도 바로 응답할 수 있도록 최신 스냅샷을 파일에 저장합니다. """
+    if old.version == new.version:
+        return  # 바뀐 작업이 없으면 (version 유지) 다시 쓰지 않음
+    try:
+        save_snapshot(new, TASK_SNAPSHOT_FILE)
+    except OSError as e:
+        logging.error(f"Error saving task snapshot: {e}")
+
 # 서버 시작시 로드 블럭 -----------------------------------------------------------
-task_times = load_task_times() # 서버 시작 시 저장된 task_times 로드
-build_folder_mapping() # 서버 시작 시 매핑 데이터 구축
-load_mapping_from_file() # 서버 시작 시 매핑 데이터 로드
+# 이 블럭은 로컬 파일만 읽습니다. 115 호출(클라이언트 생성, 작업 목록/폴더 조회)은 모두 백그라운드에서 수행됩니다.
+TASK_SNAPSHOT_FILE = os.path.join(DATA_DIR, 'task_snapshot.json') # 마지막 작업 목록 스냅샷 (재시작 시 바로 응답하기 위함)
+task_store = TaskStore(TASK_DB_FILE, legacy_json_path=TASK_TIMES_FILE) # 서버 시작 시 저장소를 열고 필요 시 JSON에서 마이그레이션
+folder_index = FolderIndex(FOLDER_INDEX_FILE, ttl=FOLDER_INDEX_TTL) # 폴더 인덱스 (처음 사용할 때 파일에서 로드)
+folder_search = FolderSearchIndex(folder_index) # /folders/search용 검색 인덱스 (폴더 인덱스가 바뀌면 다시 생성, 크롤 중에는 끝날 때 한 번만)
+folder_crawler = FolderCrawler(lambda folder_id: list_subfolders(folder_id, save=False, force=True), folder_index.save,
+                               index=folder_index, search_index=folder_search, interval=FOLDER_CRAWL_INTERVAL,
+                               concurrency=FOLDER_CRAWL_CONCURRENCY, full_every=FOLDER_CRAWL_FULL_EVERY)
+event_hub = EventHub() # /tasks/stream 구독자 관리
+history_archive = HistoryArchive(HISTORY_FILE, compact_every=HISTORY_COMPACT_EVERY) # 처음 사용할 때 파일에서 로드
+task_poller = TaskPoller(build_task_snapshot, TASK_POLL_INTERVAL)
+persisted_snapshot = load_snapshot(TASK_SNAPSHOT_FILE)
+if persisted_snapshot is not None:
+    task_poller.seed(persisted_snapshot) # 첫 조회가 끝날 때까지 저장된 스냅샷으로 응답
+    logging.info(f"Serving persisted task snapshot (version {persisted_snapshot.version}, {len(persisted_snapshot.tasks)} tasks) until the first refresh")
+task_poller.add_listener(publish_task_delta)
+task_poller.add_listener(persist_task_snapshot)
+task_poller.add_listener(dispatcher.on_snapshot)
+
+def warm_up_tasks():
+    """ 115 작업 목록을 한 번 조회할 때까지 기다립니다. (폴러의 첫 조회가 실패했다면 다시 요청) """
+    task_poller.wait_first_poll()
+    if not task_poller.live:
+        task_poller.refresh_now()
+    if not task_poller.live:
+        raise RuntimeError('Task list has not been loaded from 115 yet')
+
+def warm_up_folders():
+    """ 화면에서 처음 쓰는 폴더(기본 다운로드 폴더 경로, 루트 하위 목록)를 폴더 인덱스에 준비합니다. """
+    list_subfolders('0')
+    if default_download_path_id:
+        unresolvable_folders.pop((primary_account.name, str(default_download_path_id)), None)
+        resolve_folder(default_download_path_id)
+
+warm_up = WarmUp([
+    ('p115_client', p115_clients.get),
+    ('tasks', warm_up_tasks),
+    ('folders', warm_up_folders),
+    ('folder_crawler', folder_crawler.start),
+])
+warm_up.start() # 클라이언트 생성 -> 첫 작업 목록 조회 -> 폴더 인덱스 준비 -> 전체 폴더 크롤 시작
+task_poller.start() # 백그라운드 작업 목록 갱신 시작
+
+# app.route 블럭 상태 확인 ----------------------------------------------------------------
+@app.route('/healthz', methods=['GET']) # 프로세스가 요청을 처리할 수 있는지 (115 상태와 무관)
+def healthz():
+    return jsonify({'status': 'ok', 'uptime': round(time.time() - warm_up.started_at, 3)})
+
+@app.route('/readyz', methods=['GET']) # warm-up이 끝났는지와 단계별 상태. 준비되지 않았으면 503
+def readyz():
+    status = warm_up.status()
+    snapshot = task_poller.snapshot
+    status['p115_client'] = {'ready': p115_clients.ready, 'error': p115_clients.error}
+    status['accounts'] = {name: {'ready': account.clients.ready, 'error': account.clients.error} for name, account in accounts.items()}
+    status['task_snapshot'] = {
+        'version': snapshot.version,
+        'tasks': len(snapshot.tasks),
+        'updated_at': snapshot.updated_at if snapshot.version else None,
+        'source': 'live' if task_poller.live else ('persisted' if snapshot.version else 'none'),
+    }
+    status['folder_crawler'] = dict(folder_crawler.state, folders=len(folder_index))
+    return jsonify(status), 200 if status['ready'] else 503
+
+# 조건부 응답/압축 블럭 -----------------------------------------------------------------
+# /tasks, /folders는 스냅샷/폴더 인덱스의 version으로 만든 ETag를 붙이고, If-None-Match가 같으면 본문 없이 304를 반환합니다.
+# 폴더 인덱스의 version은 재시작하면 0부터 다시 시작하므로 프로세스마다 다른 BOOT_ID를 ETag에 넣습니다.
+BOOT_ID = os.urandom(4).hex()
+snapshot_checksums = {} # {snapshot version: 본문 crc32} 저장된 스냅샷 없이 재시작해 version이 1부터 다시 시작해도 ETag가 겹치지 않도록
+
+def snapshot_etag(snapshot):
+    checksum = snapshot_checksums.get(snapshot.version)
+    if checksum is None:
+        checksum = f"{zlib.crc32(snapshot.payload.encode('utf-8')):08x}"
+        snapshot_checksums.clear()
+        snapshot_checksums[snapshot.version] = checksum
+    return make_etag('tasks', snapshot.version, checksum)
+
+encoded_bodies = EncodedBodyCache() # {(ETag, 인코딩): (압축된 본문, Content-Encoding)} 같은 스냅샷은 한 번만 직렬화/압축
+
+def conditional_response(etag, build_body, cache=False):
+    """ etag가 If-None-Match와 같으면 304, 아니면 build_body()의 본문(str/bytes)을 협상한 인코딩으로 압축해 반환합니다.
+        cache가 True면 압축된 본문을 ETag별로 재사용합니다. (스냅샷 전체 목록처럼 큰 본문용) """
+    encoding = negotiate_encoding(request.accept_encodings)
+    etag = make_etag(etag, encoding) # 강한 ETag는 인코딩마다 달라야 함
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        def encode():
+            body = build_body()
+            body = body.encode('utf-8') if isinstance(body, str) else body
+            if encoding and len(body) >= MIN_COMPRESS_SIZE:
+                return compress(body, encoding), encoding
+            return body, None
+
+        if cache:
+            (body, content_encoding), hit = encoded_bodies.get((etag, encoding), encode)
+            record_cache('encoded_body', hit)
+        else:
+            body, content_encoding = encode()
+        response = Response(body, mimetype='application/json')
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache' # 브라우저가 매번 If-None-Match로 재검증하도록
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.after_request
+def compress_response(response):
+    """ 그 밖의 JSON/HTML 응답도 클라이언트가 허용하면 압축합니다. (SSE 스트림, 파일 전송, 작은 본문은 제외) """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings)
+    body = response.get_data()
+    if encoding and len(body) >= MIN_COMPRESS_SIZE:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 # app.route 블럭 index ------------------------------------------------------------------
 @app.route('/')
 def index():
-    fs.chdir('/')
-    build_folder_mapping('/')  # 루트 디렉토리의 매핑 데이터를 구축  
-    current_folder_name = folder_id_to_name.get(default_download_path_id, "N/A") # default_download_path_id에 해당하는 폴더 경로를 찾음
-    # current_folder_name이 '/'로 시작하는지 확인하고, 그렇지 않으면 '/'를 추가
-    full_path_name = f"{current_folder_name}" if current_folder_name.startswith('/') else f"/{current_folder_name}"
-
-    folders = fs.listdir_attr(path='/')
-    folder_list = [{'id': str(folder['id']), 'name': folder['name']} for folder in folders if folder.get('is_directory')]
+    full_path_name = get_full_folder_path(default_download_path_id) # default_download_path_id에 해당하는 폴더 경로를 인덱스에서 찾음
+
+    try:
+        folders = list_subfolders('0')  # 루트 디렉토리의 폴더 목록 (캐시가 유효하면 115 호출 없음)
+    except Exception as e:
+        logging.error(f"Error fetching root folders: {e}")
+        folders = []  # 115가 준비되지 않았어도 화면은 표시 (작업 목록은 저장된 스냅샷으로 표시됨)
+    folder_list = [{'id': folder['id'], 'name': folder['name']} for folder in folders]
     
     return render_template('index.html', folders=folder_list, default_download_path_id=default_download_path_id, default_download_path_name=full_path_name)
 
 # app.route 블럭 folder 탐색 관련 -------------------------------------------------------
-@app.route('/folders', methods=['GET']) # 루트 디렉터리의 폴더 목록을 가져오는 기능을 수행
+def folder_listing(data):
+    """ 요청마다 folder_id(또는 절대 경로 path)로 대상 폴더를 지정합니다. 공유 객체의 현재 위치(cwd)는 사용하지 않습니다.
+        이전 방식의 folder_name은 current_path(클라이언트가 보고 있던 경로) 기준의 상대 이름 또는 '..'로 해석합니다. """
+    if data.get('folder_id') is not None:
+        current_folder_id = str(data['folder_id'])
+    elif data.get('path'):
+        current_folder_id = resolve_path(data['path'])
+    else:
+        target_folder_name = data.get('folder_name') or '/'
+        base_path = data.get('current_path') or '/'
+        if target_folder_name == '..':
+            # 현재 경로에서 마지막 폴더 이름을 제거하여 상위 폴더 경로를 만듦
+            target_path = '/'.join(normalize_path(base_path).split('/')[:-1]) or '/'
+        elif target_folder_name.startswith('/'):
+            target_path = target_folder_name
+        else:
+            target_path = f"{base_path}/{target_folder_name}"
+        current_folder_id = resolve_path(target_path)
+
+    # 대상 폴더의 경로, 부모 ID, 하위 폴더 목록 (폴더 인덱스에 있으면 115 호출 없음)
+    node = resolve_folder(current_folder_id)
+    folders = list_subfolders(current_folder_id)
+    parent_folder_id = node['parent_id'] if current_folder_id != '0' else '0'
+
+    folder_list = [{'id': folder['id'], 'name': folder['name']} for folder in folders]
+
+    return {'folders': folder_list, 'current_path': node['path'], 'current_folder_id': current_folder_id, 'parent_folder_id': parent_folder_id}
+
+@app.route('/folders', methods=['GET']) # 폴더 목록. 인자가 없으면 루트 폴더 목록, folder_id 또는 path를 주면 POST와 같은 응답 (ETag 지원)
 def list_folders():
+    version = folder_index.version
     try:
-        folder_list = fs.listdir_attr(path="/")  # 루트 디렉토리의 폴더 목록 가져오기
-        folders = []
-        for folder in folder_list:
-            if folder.get('is_directory'):
-                folder_id = str(folder['id'])
-                folder_name = folder['name']
-                folder_id_to_name[folder_id] = folder_name  # folder_id_to_name에 추가
-                logging.info(f"Folder ID: {folder_id}, Folder Name: {folder_name}")  # 디버깅 로그 추가
-                folders.append({'id': folder_id, 'name': folder_name})
-        return jsonify({'folders': folders})
+        if request.args.get('folder_id') or request.args.get('path'):
+            data = folder_listing(request.args)
+        else:
+            folder_list = list_subfolders('0')  # 루트 디렉토리의 폴더 목록 가져오기
+            data = {'folders': [{'id': folder['id'], 'name': folder['name']} for folder in folder_list]}
     except Exception as e:
         logging.error(f"Error fetching folder list: {e}")
-        return jsonify({'error': 'Failed to fetch folders'}), 500
+        return jsonify({'error': 'Failed to fetch folders', 'message': str(e)}), 500
+
+    if folder_index.version != version:
+        return jsonify(data)  # 목록을 만드는 동안 인덱스가 바뀌었으면 어느 version의 내용인지 알 수 없으므로 ETag 없이 응답
+    etag = make_etag('folders', BOOT_ID, version, query_hash(request.args))
+    return conditional_response(etag, lambda: json.dumps(data, ensure_ascii=False))
 
 @app.route('/folders', methods=['POST'])
 def change_directory():
-    data = request.json
-    target_folder_name = data.get('folder_name')
-
     try:
-        if target_folder_name == '..':
-            # 현재 디렉토리 정보를 가져옴
-            current_path = fs.getcwd()
-            logging.info(f"Current path: {current_path}")
-
-            # 현재 경로에서 마지막 폴더 이름을 제거하여 상위 폴더 경로를 만듦
-            parent_path = '/'.join(current_path.rstrip('/').split('/')[:-1])
-            if not parent_path:
-                parent_path = '/'  # 루트 폴더로 이동
-
-            logging.info(f"Resolved parent path: {parent_path}")
-            fs.chdir(parent_path)
-            logging.info(f"Changed directory to parent path: {parent_path}")
-
-        else:
-            # 특정 폴더로 이동
-            fs.chdir(target_folder_name)
-            logging.info(f"Changed directory to: {target_folder_name}")
-
-        # 현재 경로 및 하위 폴더 목록을 반환
-        current_path = fs.getcwd()
-        folders = fs.listdir_attr(path=current_path)
-        # logging.info(f"Folders in new path: {folders}")
-
-        # 새로 이동한 폴더의 parent ID 확인
-        current_folder_id = fs.getcid()
-        new_folder_attrs = fs.listdir_attr(current_path)
-        parent_folder_id = '0'
-        for attr in new_folder_attrs:
-            # logging.info(f"Checking new folder attribute: {attr}")
-            # 각 속성의 ancestors를 탐색하여 현재 폴더의 id와 일치하는 항목을 찾음
-            for ancestor in attr.get('ancestors', []):
-                # logging.info(f"Checking new ancestor: {ancestor}")
-                if str(ancestor['id']) == str(current_folder_id):
-                    parent_folder_id = str(ancestor['parent_id'])
-                    logging.info(f"Found matching ancestor in new path. Parent ID: {parent_folder_id}")
-                    break
-
-            # parent_id를 찾았다면 더 이상 탐색하지 않음
-            if parent_folder_id != '0':
-                break
-        
-        logging.info(f"Final Parent folder ID after change: {parent_folder_id}")
-        
-        # 폴더 매핑 정보를 업데이트하고 저장합니다.
-        folder_id_to_name[str(current_folder_id)] = current_path
-        save_mapping_to_file()
-
-        folder_list = [{'id': str(folder['id']), 'name': folder['name']} for folder in folders if folder.get('is_directory')]
-
-        return jsonify({'folders': folder_list, 'current_path': current_path, 'parent_folder_id': parent_folder_id})
-
+        return jsonify(folder_listing(request.json or {}))
     except Exception as e:
         logging.error(f"Error fetching folders: {e}")
         return jsonify({'error': 'Failed to fetch folders', 'message': str(e)}), 500
 
+@app.route('/folders/search', methods=['GET']) # 폴더 이름 검색 (접두어/부분 문자열). 크롤러가 채운 인덱스만 사용
+def search_folders():
+    q = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', '20')), 200))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    return jsonify({'folders': folder_search.search(q, limit), 'indexed': len(folder_search), 'crawling': folder_crawler.state['running']})
+
+@app.route('/accounts', methods=['GET']) # 계정별 상태: 클라이언트 준비 여부, 진행 중인 작업 수, 남은 할당량, 배정 여유
+def list_accounts():
+    load = dispatcher.state()
+    return jsonify({'accounts': [
+        dict(load[name], name=name, primary=account is primary_account, folder_id=account.folder_id,
+             ready=account.clients.ready, error=account.clients.error)
+        for name, account in accounts.items()
+    ]})
+
 @app.route('/get_folder_id', methods=['GET'])
 def get_folder_id():
     try:
-        current_folder_id = str(fs.getcid()) # 현재 위치의 폴더 ID를 가져옴
+        current_folder_id = resolve_path(request.args.get('path', '/')) # 주어진 경로의 폴더 ID를 가져옴
         return jsonify({'folder_id': current_folder_id})
     except Exception as e:
         return jsonify({'error': 'Failed to get folder ID', 'message': str(e)}), 500 
@@ -213,12 +649,7 @@ def get_full_path_name():
         if folder_id == '0':
             full_path_name = '/'
         else:
-            current_path = fs.getcwd()
-            folder_name = folder_id_to_name.get(folder_id, '')
-            full_path_name = f"{current_path}/{folder_name}".replace('//', '/')
-
-            if full_path_name.endswith('/'):
-                full_path_name = full_path_name.rstrip('/')
+            full_path_name = get_full_folder_path(folder_id)  # 폴더 인덱스에서 전체 경로를 찾음
 
         return jsonify({'full_path_name': full_path_name})
 
@@ -226,53 +657,103 @@ def get_full_path_name():
         return jsonify({'error': 'Failed to get full path name', 'message': str(e)}), 500
 
 # app.route 블럭 task 추가 관련 -------------------------------------------------------
+BULK_ADD_CHUNK_SIZE = int(os.getenv('BULK_ADD_CHUNK_SIZE', '15')) # add_task_urls 1회 호출당 최대 링크 수
+BULK_ADD_CONCURRENCY = int(os.getenv('BULK_ADD_CONCURRENCY', '3')) # 동시에 전송할 묶음 수
+
+def place_tasks(count, account_name=None, folder_id=None):
+    """ count개의 새 작업을 넣을 (계정, 저장 폴더)를 정합니다. account_name을 지정하면 그 계정을 사용하고,
+        지정하지 않으면 dispatcher가 고른 계정을 사용합니다. 요청의 폴더는 기본 계정의 폴더이므로
+        다른 계정이 선택(지정 포함)되면 그 계정에 설정된 folder_id에 저장합니다. """
+    if account_name:
+        account = accounts[account_name]
+    elif len(accounts) == 1:
+        account = primary_account
+    else:
+        account = accounts[dispatcher.choose(count)]
+    if account is not primary_account:
+        folder_id = None
+    return account, folder_id or account.folder_id
+
+def after_tasks_added(account, folder_id):
+    """ 작업을 추가한 뒤 저장 폴더의 하위 목록 캐시를 무효화하고 스냅샷 갱신을 요청합니다. """
+    if account is primary_account: # 폴더 인덱스는 기본 계정 폴더만 담고 있음
+        folder_index.invalidate(folder_id)  # 다운로드 폴더가 새로 생기므로 하위 목록 캐시 무효화
+    task_poller.refresh_now(wait=False)  # 스냅샷 갱신 요청
+
+def unknown_account(data):
+    """ 요청에 지정한 account가 설정에 없으면 400 응답, 아니면 None. """
+    if data.get('account') and data['account'] not in accounts:
+        return jsonify({'error': f"Unknown account: {data['account']}"}), 400
+    return None
+
 @app.route('/add_task', methods=['POST'])
 def add_single_task():
     data = request.json
     magnet_url = data.get('magnet_url')
-    folder_id = data.get('wp_path_id', default_download_path_id)  # 기본 다운로드 경로 ID를 사용
-    logging.info(f"Received magnet URL: {magnet_url} for Folder ID: {folder_id}")
+    folder_id = data.get('wp_path_id')  # 없으면 배정된 계정의 기본 다운로드 경로 ID를 사용
 
     if not magnet_url:
         return jsonify({'error': 'No magnet URL provided'}), 400
+    error = unknown_account(data)
+    if error:
+        return error
 
-    task_times = load_task_times()
-
-    response = requests.post(
-        "https://115.com/web/lixian/?ct=lixian&ac=add_task_url",
-        headers={
-            "Cookie": cookie,
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36 Edg/127.0.0.0"
-        },
-        data={
-            "url": magnet_url,
-            "wp_path_id": folder_id,
-            "uid": uid,
-        }
-    )
+    account, folder_id = place_tasks(1, data.get('account'), folder_id)
+    logging.info(f"Received magnet URL: {magnet_url} for Folder ID: {folder_id} (account {account.name})")
+    try:
+        result = account.web.add_task_url(magnet_url, folder_id)
+    except Web115Error as e:
+        logging.error(f"Exception occurred while sending request: {e}")
+        return jsonify({'error': f"Exception occurred: {str(e)}"}), 500
 
-    result = response.json()
     logging.info(f"Task add result: {result}")
 
     if result.get('state'):
         task_id = result.get('info_hash', 'Unknown ID')
         original_size = format_size(result.get('size', 0))  # 작업 추가 시 가져온 크기를 기록
         
-        if task_id not in task_times: # 이미 존재하는 task_id의 created_time을 유지하고 original_size를 추가
-            task_times[task_id] = {
+        task_time = task_store.get(task_id)
+        if task_time is None: # 이미 존재하는 task_id의 created_time을 유지하고 original_size를 추가
+            task_time = {
                 'created_time': datetime.now().isoformat(),
                 'folder_id': folder_id,
-                'original_size': original_size
+                'original_size': original_size,
+                'account': account.name
             }
+            task_store.upsert(task_id, task_time)
 
-        save_task_times(task_times)
-
-        logging.info(f"Task added: ID={task_id}, Name={result.get('name', 'Unknown Name')}, Status={result.get('state')}, Folder ID={folder_id}, Created Time={task_times[task_id]['created_time']}, Original Size={original_size}")
-        return jsonify({'status': 'success', 'result': task_id})
+        logging.info(f"Task added: ID={task_id}, Name={result.get('name', 'Unknown Name')}, Status={result.get('state')}, Folder ID={folder_id}, Created Time={task_time['created_time']}, Original Size={original_size}")
+        after_tasks_added(account, folder_id)
+        return jsonify({'status': 'success', 'result': task_id, 'account': account.name})
     else:
         logging.error(f"Error adding task: {result.get('error_msg', 'Unknown error')}")
         return jsonify({'error': f"Failed to add task: {result.get('error_msg', 'Unknown error')}"})
 
+def record_added_tasks(task_results, folder_id, account_name):
+    """ 115 작업 추가 응답의 작업들을 한 번의 트랜잭션으로 저장하고 task_id 목록을 반환합니다. """
+    task_times = task_store.get_many(task_result.get('info_hash', 'Unknown ID') for task_result in task_results) # 응답에 있는 작업의 레코드만 조회
+    updates = {} # 응답의 모든 작업을 모아 한 번의 트랜잭션으로 저장
+    for task_result in task_results:
+        task_id = task_result.get('info_hash', 'Unknown ID')
+        task_name = task_result.get('name', 'Unknown Name')
+        original_size = format_size(task_result.get('size', 0))  # 작업 추가 시 가져온 크기를 기록
+
+        if task_id not in task_times:
+            task_times[task_id] = {
+                'created_time': datetime.now().isoformat(),  # 작업 추가 시점 기록
+                'folder_id': folder_id,
+                'original_size': original_size,
+                'account': account_name
+            }
+        else:
+            task_times[task_id]['original_size'] = original_size
+        updates[task_id] = task_times[task_id]
+
+        logging.debug(f"Task added: ID={task_id}, Name={task_name}, Status={task_result.get('state')}, Folder ID={folder_id}, Created Time={task_times[task_id]['created_time']}, Original Size={original_size}")
+
+    task_store.upsert_many(updates)
+    return list(updates)
+
 @app.route('/tasks/add', methods=['POST'])
 def add_multiple_tasks():
     data = request.json
@@ -284,236 +765,440 @@ def add_multiple_tasks():
 
     if not folder_id:
         return jsonify({'error': 'No folder ID provided'}), 400
+    error = unknown_account(data)
+    if error:
+        return error
 
-    task_times = load_task_times()
     task_ids = []
     
-    # URL 데이터를 URL[0], URL[1] 형식으로 변환 (','로 구분)
-    url_data = {f"url[{i}]": url.strip() for i, url in enumerate(urls.split(',')) if url.strip()}
+    # ','로 구분된 URL 목록 (클라이언트가 url[0], url[1] 형식으로 변환해 한 번에 전송)
+    url_list = [url.strip() for url in urls.split(',') if url.strip()]
     
-    logging.info(f"Generated url_data: {url_data}") # url_data의 내용을 로그로 출력
-
-    # POST 데이터 설정
-    post_data = {
-        "wp_path_id": folder_id,
-        "savepath": "",
-        "uid": uid,
-        **url_data  # URL 배열 데이터 추가
-    }
-    
-    logging.info(f"Prepared URL data for request: {post_data}") # post_data의 내용을 로그로 출력
-
-    try:
-        response = requests.post(
-            "https://115.com/web/lixian/?ct=lixian&ac=add_task_urls",
-            headers={
-                "Cookie": cookie,
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15",
-                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
-            },
-            data=post_data  # 데이터를 한 번에 전송
-        )
-        
-        try: # 응답이 올바른 JSON 형식인지 확인
-            result = response.json()
-            logging.info(f"Result structure: {result}")
-
-            if result.get('state'):
-                for task_result in result.get('result', []):
-                    task_id = task_result.get('info_hash', 'Unknown ID')
-                    task_name = task_result.get('name', 'Unknown Name')
-                    original_size = format_size(task_result.get('size', 0))  # 작업 추가 시 가져온 크기를 기록
-
-                    if task_id not in task_times:
-                        task_times[task_id] = {
-                            'created_time': datetime.now().isoformat(),  # 작업 추가 시점 기록
-                            'folder_id': folder_id,
-                            'original_size': original_size
-                        }
-                    else:
-                        task_times[task_id]['original_size'] = original_size
+    logging.debug(f"Generated url list: {url_list}") # url 목록을 로그로 출력
 
-                    save_task_times(task_times)
+    account, folder_id = place_tasks(len(url_list), data.get('account'), folder_id)
+    try: # 요청 실패, JSON이 아닌 응답 등은 Web115Error로 전달됨
+        result = account.web.add_task_urls(url_list, folder_id)
+        logging.debug(f"Result structure: {result}")
 
-                    task_ids.append(task_id)
-                    logging.info(f"Task added: ID={task_id}, Name={task_name}, Status={task_result.get('state')}, Folder ID={folder_id}, Created Time={task_times[task_id]['created_time']}, Original Size={original_size}")
-            else:
-                logging.error(f"Error adding task: {result.get('error_msg', 'Unknown error')}")
-        except requests.exceptions.JSONDecodeError:
-            logging.error(f"Failed to decode JSON response: {response.text}")
-            return jsonify({'error': 'Failed to decode server response as JSON'}), 500
+        if result.get('state'):
+            task_ids = record_added_tasks(result.get('result', []), folder_id, account.name)
+            after_tasks_added(account, folder_id)
+        else:
+            logging.error(f"Error adding task: {result.get('error_msg', 'Unknown error')}")
 
     except Exception as e:
         logging.error(f"Exception occurred while sending request: {e}")
         return jsonify({'error': f"Exception occurred: {str(e)}"}), 500
 
-    return jsonify({'status': 'success', 'result': task_ids})
-
-# app.route 블럭: 작업목록을 보여주는 기능 수행 -------------------------------------------------------
-@app.route('/tasks', methods=['GET'])
-def list_tasks():
-    tasks = []
-    running_count = 0
-    complete_count = 0
-
-    all_tasks = offline_service.list()
-    task_times = load_task_times()
-
-    for task in all_tasks:
-        task_id = task.get('info_hash', 'Unknown ID')
-
-        if task_id in task_times:
-            created_time = datetime.fromisoformat(task_times[task_id]['created_time'])
-            completed_time = task_times[task_id].get('completed_time')
-            original_size = task_times[task_id].get('original_size', None)
-            
-            if completed_time:
-                completed_time = datetime.fromisoformat(completed_time)
-        else:
-            created_time = datetime.fromtimestamp(task.get('add_time', 0))
-            completed_time = None
-            original_size = None
+    return jsonify({'status': 'success', 'result': task_ids, 'account': account.name})
 
-        if original_size is None or original_size == "0.0 B":
-            original_size = format_size(task.get('size', 0))
-            task_times[task_id] = {
-                'created_time': created_time.isoformat(),
-                'original_size': original_size,
-                'folder_id': task.get('wp_path_id', 'N/A')
-            }
+@app.route('/tasks/add_bulk', methods=['POST']) # 대량 링크 추가: 작업 큐에 등록하고 job_id를 바로 반환
+def add_bulk_tasks():
+    data = request.json or {}
+    try:
+        links = parse_links(data.get('links') or data.get('urls') or '')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    folder_id = data.get('wp_path_id')
 
-            if completed_time:
-                task_times[task_id]['completed_time'] = completed_time.isoformat()
-            save_task_times(task_times)
+    if not links:
+        return jsonify({'error': 'No URLs provided'}), 400
 
-        folder_id = task_times[task_id].get('folder_id', 'N/A')
-        
-        if folder_id not in folder_id_to_name:  # 기존 매핑에 없을 경우 매핑을 시도합니다.
-            try:
-                explore_folder(folder_id)  # 탐색 시 해당 폴더의 매핑 수행
-            except Exception as e:
-                logging.error(f"Error exploring folder for ID {folder_id}: {e}")
-                folder_name = 'N/A'
-        folder_name = folder_id_to_name.get(folder_id, 'N/A')
+    if not folder_id:
+        return jsonify({'error': 'No folder ID provided'}), 400
+    error = unknown_account(data)
+    if error:
+        return error
+
+    job = job_queue.submit('add_bulk', {'links': links, 'wp_path_id': folder_id, 'account': data.get('account')})
+    return jsonify({'status': 'queued', 'job_id': job['id']}), 202
+
+def run_bulk_add(payload, job):
+    """ 작업 큐에서 실행: 중복 제거 후 묶음 단위로 동시에 전송하고, 묶음이 끝날 때마다 링크별 결과를 보고합니다. """
+    links, folder_id = payload['links'], payload['wp_path_id']
+
+    # 이미 알고 있는 작업(저장소 + 현재 스냅샷)과 같은 info_hash는 다시 보내지 않음 (저장소는 링크의 info_hash만 조회)
+    link_hashes = [info_hash for info_hash in (extract_info_hash(link) for link in links) if info_hash]
+    upstream = task_poller.snapshot.upstream
+    known_hashes = set(task_store.get_many(link_hashes)) | {info_hash for info_hash in link_hashes if info_hash in upstream}
+    to_submit, skipped = plan_ingest(links, known_hashes)
+    logging.info(f"Bulk add: {len(links)} links, {len(to_submit)} to submit, {len(skipped)} skipped")
+
+    summary = {}
+    def tally(outcomes):
+        for outcome in outcomes:
+            summary[outcome['status']] = summary.get(outcome['status'], 0) + 1
+        return dict(summary)
+
+    job.report(skipped, total=len(links), submitted=len(to_submit), summary=tally(skipped))
+
+    placements = {} # {link: (계정, 저장 폴더)} 묶음마다 dispatcher가 계정을 고름
+    def add_urls(urls):
+        account, target_folder_id = place_tasks(len(urls), payload.get('account'), folder_id)
+        placements.update((url, (account, target_folder_id)) for url in urls)
+        return account.web.add_task_urls(urls, target_folder_id)
+
+    throttled = False
+    added_folders = set()
+    chunks = submit_in_chunks(add_urls, to_submit, BULK_ADD_CHUNK_SIZE, BULK_ADD_CONCURRENCY)
+    for outcomes in chunks:
+        added_by_folder = {} # {(계정 이름, 저장 폴더): [outcome, ...]}
+        for outcome in outcomes:
+            account, target_folder_id = placements.get(outcome['link'], (primary_account, folder_id))
+            outcome['account'] = account.name
+            if outcome['status'] == 'added':
+                added_by_folder.setdefault((account.name, target_folder_id), []).append(outcome)
+        for (account_name, target_folder_id), added in added_by_folder.items():
+            record_added_tasks(added, target_folder_id, account_name)
+        added_folders.update(added_by_folder)
+        throttled = throttled or any(outcome.get('errno') == 911 for outcome in outcomes)
+        job.report(outcomes, summary=tally(outcomes))
+
+    for account_name, target_folder_id in added_folders:
+        after_tasks_added(accounts[account_name], target_folder_id)
+    if throttled:
+        # 재시도 시 이미 추가된 링크는 existing으로 건너뛰고 실패한 링크만 다시 전송됨
+        raise ThrottledError('115 requires captcha verification (errno 911)')
+    return {'summary': summary}
 
-        folder_path = task.get('del_path', '').strip('/')
-        target_name = folder_path.split('/')[-1]
+# app.route 블럭: 작업목록을 보여주는 기능 수행 -------------------------------------------------------
+@app.route('/tasks', methods=['GET'])
+def list_tasks():
+    snapshot = task_poller.wait_ready()  # 첫 조회가 끝나기 전이라면 잠시 기다림
+    response_format = request.args.get('format', 'rows')
+    if response_format not in FORMATS:
+        return jsonify({'error': f"Invalid format: {response_format}"}), 400
+    etag = make_etag(snapshot_etag(snapshot), query_hash(request.args)) # 스냅샷 version + 쿼리 인자
+
+    if not TASK_QUERY_PARAMS.intersection(request.args):
+        if response_format == 'columns':  # 전체 목록의 열 형식 (스냅샷마다 한 번만 직렬화)
+            return conditional_response(etag, lambda: json.dumps(dict(
+                to_columns(snapshot, snapshot.tasks), running_count=snapshot.running_count,
+                complete_count=snapshot.complete_count, version=snapshot.version), ensure_ascii=False), cache=True)
+        return conditional_response(etag, lambda: snapshot.payload, cache=True)  # 전체 목록 (미리 직렬화된 본문)
+
+    # 필터/정렬/페이지네이션: 스냅샷의 정렬 인덱스에서 페이지 크기만큼만 읽음
+    args = {key: request.args[key] for key in TASK_QUERY_PARAMS if key in request.args}
+    args['format'] = response_format
+    if 'fields' in args:
+        args['fields'] = args['fields'].split(',')
+    try:
+        return conditional_response(etag, lambda: json.dumps(get_task_view(snapshot).query(**args), ensure_ascii=False))
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+TASK_QUERY_PARAMS = {'status', 'folder', 'folder_id', 'account', 'q', 'since', 'until', 'sort', 'order', 'limit', 'cursor', 'fields'}
+task_view_cache = {} # {snapshot version: TaskView} 최신 스냅샷 하나만 보관
+
+def get_task_view(snapshot):
+    view = task_view_cache.get(snapshot.version)
+    record_cache('task_view', view is not None)
+    if view is None:
+        view = TaskView(snapshot)
+        task_view_cache.clear()
+        task_view_cache[snapshot.version] = view
+    return view
+
+@app.route('/tasks/stream', methods=['GET']) # 작업 목록 변경분을 Server-Sent Events로 전송
+def stream_tasks():
+    def generate():
+        q = event_hub.subscribe()  # 스냅샷을 읽기 전에 구독해야 그 사이의 변경을 놓치지 않음
+        try:
+            snapshot = task_poller.snapshot
+            yield format_sse('snapshot', snapshot.payload, snapshot.version)
+            while True:
+                try:
+                    event, data, event_id = q.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if event == RESYNC:
+                    snapshot = task_poller.snapshot
+                    yield format_sse('snapshot', snapshot.payload, snapshot.version)
+                else:
+                    yield format_sse(event, data, event_id)
+        finally:
+            event_hub.unsubscribe(q)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/tasks/refresh', methods=['POST']) # 즉시 115에서 다시 조회하고 최신 스냅샷을 반환
+def refresh_tasks():
+    snapshot = task_poller.refresh_now()
+    return app.response_class(snapshot.payload, mimetype='application/json')
+
+# app.route 블럭: 작업 삭제 관련 -------------------------------------------------------
+BULK_DELETE_CHUNK_SIZE = int(os.getenv('BULK_DELETE_CHUNK_SIZE', '100')) # 1회 호출에 담을 최대 작업/파일 수
+BULK_DELETE_CONCURRENCY = int(os.getenv('BULK_DELETE_CONCURRENCY', '3')) # 동시에 보낼 삭제 요청 수
+
+def delete_tasks(task_ids, delete_folders=False, reason='deleted'):
+    """ 여러 작업을 최소한의 115 호출로 삭제하고 작업별 결과를 반환합니다.
+        - 폴더 삭제: 스냅샷의 file_id/wp_path_id를 사용해 (계정, 부모 폴더)별로 fid[i]를 묶어 rb/delete 호출
+        - 작업 삭제: 계정별로 info_hash를 묶어 offline remove 호출
+        - 저장소 변경은 마지막에 한 번만 커밋
+        - 스냅샷과 저장소 어디에도 없는 작업은 not_found로 반환하고 삭제/보관하지 않음 """
+    task_ids = list(dict.fromkeys(task_ids))  # 순서를 유지하며 중복 제거
+    upstream = task_poller.snapshot.upstream
+    if delete_folders and any(task_id not in upstream for task_id in task_ids):
+        upstream = task_poller.refresh_now().upstream  # 스냅샷에 없는 작업(방금 추가 등)의 폴더 정보를 얻기 위해 한 번 새로 조회
+    stored = task_store.get_many(task_ids)
+    results = {task_id: {'task_id': task_id, 'status': 'deleted' if task_id in upstream or task_id in stored else 'not_found'}
+               for task_id in task_ids}
+    task_ids = [task_id for task_id in task_ids if results[task_id]['status'] == 'deleted']
+    task_accounts = {task_id: get_account(upstream.get(task_id, {}).get('account') or stored.get(task_id, {}).get('account'))
+                     for task_id in task_ids} # 작업이 있는 계정
+
+    def delete_folder_chunk(account, pid, file_ids):
+        return account, pid, file_ids, account.web.delete_files(pid, file_ids)
+
+    def remove_task_chunk(account, hashes):
+        with observe_upstream('offline_remove'):
+            get_offline_service(account).remove(hashes)
+        return hashes
+
+    with ThreadPoolExecutor(max_workers=max(1, BULK_DELETE_CONCURRENCY), thread_name_prefix='bulk-delete') as executor:
+        if delete_folders:
+            files_by_parent = {} # {(계정 이름, wp_path_id): [(file_id, task_id), ...]}
+            for task_id in task_ids:
+                task = upstream.get(task_id, {})
+                if task.get('file_id') and task.get('wp_path_id'):
+                    key = (task_accounts[task_id].name, str(task['wp_path_id']))
+                    files_by_parent.setdefault(key, []).append((str(task['file_id']), task_id))
+                elif task_id not in upstream:
+                    results[task_id]['folder'] = 'skipped'  # 115 목록에 없어 폴더를 알 수 없으면 작업만 삭제
+                else:
+                    results[task_id]['folder'] = 'none'  # 연결된 폴더가 없으면 작업만 삭제
 
-        full_folder_path = f"{folder_name}/{folder_path}".replace('//', '/') if folder_path else f"/{folder_name}"
+            folder_futures = {}
+            for (account_name, pid), files in files_by_parent.items():
+                for chunk in chunked(files, BULK_DELETE_CHUNK_SIZE):
+                    future = executor.submit(delete_folder_chunk, accounts[account_name], pid, [file_id for file_id, _ in chunk])
+                    folder_futures[future] = chunk
 
-        if task.get('percentDone', 0) == 100:
-            if 'completed_time' not in task_times[task_id]:
+            for future, chunk in folder_futures.items():
                 try:
-                    folder_attrs = fs.listdir_attr(f"/{folder_name}")
-                    for attr in folder_attrs:
-                        if attr['name'] == target_name:
-                            completed_time = attr['etime']
-                            task_times[task_id]['completed_time'] = completed_time.isoformat()
-                            break
+                    account, pid, file_ids, result = future.result()
+                    deleted = bool(result.get('state', False))
+                    if deleted and account is primary_account: # 폴더 인덱스는 기본 계정 폴더만 담고 있음
+                        for file_id in file_ids:
+                            folder_index.remove(file_id)  # 삭제된 폴더를 인덱스에서도 제거
+                        folder_index.invalidate(pid)
+                    elif deleted:
+                        for file_id in file_ids:
+                            account_folder_paths.pop((account.name, file_id), None)  # 다른 계정은 경로 캐시만 정리
                     else:
-                        completed_time = datetime.fromtimestamp(task.get('last_update', 0))
-                        task_times[task_id]['completed_time'] = completed_time.isoformat()
-
-                    complete_count += 1
-                    save_task_times(task_times)
+                        logging.error(f"Failed to delete folders under {pid}. Response: {result}")
                 except Exception as e:
-                    logging.error(f"Error retrieving etime for folder {folder_id} at {full_folder_path}: {e}")
-            else:
-                complete_count += 1
-        else:
-            running_count += 1
-
-        logging.info(f"Task ID: {task_id}, Folder ID: {folder_id}, Mapped Folder Name: {folder_name}, Completed Time: {completed_time}")
-
-        task_info = {
-            'task_id': task_id,
-            'name': task.get('name', 'Unknown Name'),
-            'status': 'Complete' if task.get('percentDone', 0) == 100 else 'Running',
-            'created_time': created_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'completed_time': completed_time.strftime('%Y-%m-%d %H:%M:%S') if completed_time else '',
-            'size': original_size,
-            'percent': f"{task.get('percentDone', 0):.1f}",
-            'folder_name': folder_name
+                    logging.error(f"Error occurred while trying to delete folders: {e}")
+                    deleted = False
+                # 파일 삭제가 실패(폴더가 없어서)하더라도 작업목록은 삭제함
+                for _, task_id in chunk:
+                    results[task_id]['folder'] = 'deleted' if deleted else 'failed'
+            folder_index.save()
+
+        ids_by_account = {} # {계정 이름: [task_id, ...]}
+        for task_id in task_ids:
+            ids_by_account.setdefault(task_accounts[task_id].name, []).append(task_id)
+        task_futures = {
+            executor.submit(remove_task_chunk, accounts[account_name], chunk): chunk
+            for account_name, account_task_ids in ids_by_account.items()
+            for chunk in chunked(account_task_ids, BULK_DELETE_CHUNK_SIZE)
         }
-        tasks.append(task_info)
-
-    return jsonify({'tasks': tasks, 'running_count': running_count, 'complete_count': complete_count})
-
-@app.route('/tasks/<task_id>', methods=['DELETE']) # 작업목록을 json파일에서 삭제하는 기능 수행
+        for future, chunk in task_futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Error deleting {len(chunk)} tasks: {e}")
+                for task_id in chunk:
+                    results[task_id].update(status='failed', error=str(e))
+
+    removed_ids = [task_id for task_id in task_ids if results[task_id]['status'] == 'deleted']
+    archived_ids = task_store.delete_many(removed_ids)  # 저장소에서 한 번에 삭제하고, 실제로 삭제된 작업만 보관 (폴러가 먼저 정리한 작업은 제외)
+    archive_tasks(archived_ids, stored, task_poller.snapshot, reason)
+    task_poller.refresh_now(wait=False)  # 스냅샷 갱신 요청
+    logging.info(f"Deleted {len(removed_ids)} of {len(results)} tasks (delete_folders={delete_folders})")
+    return list(results.values())
+
+@app.route('/tasks/delete', methods=['POST']) # 여러 작업을 한 번에 삭제 (delete_folders가 true면 다운로드 폴더도 삭제)
+def delete_multiple_tasks():
+    data = request.json or {}
+    task_ids = data.get('task_ids') or []
+    if not task_ids:
+        return jsonify({'error': 'No task IDs provided'}), 400
+
+    job = job_queue.submit('delete', {'task_ids': task_ids, 'delete_folders': bool(data.get('delete_folders'))})
+    return jsonify({'status': 'queued', 'job_id': job['id']}), 202
+
+@app.route('/tasks/<task_id>', methods=['DELETE']) # 작업목록을 저장소에서 삭제하는 기능 수행
 def delete_task(task_id):
-    try:
-        offline_service.remove(task_id)
-        remove_task_time(task_id)  # JSON 파일에서 해당 task_id 삭제
-        return jsonify({'status': 'deleted'})
-    except Exception as e:
-        logging.error(f"Error deleting task {task_id}: {e}")
-        return jsonify({'error': f"Failed to delete task {task_id}"}), 500
+    job = job_queue.submit('delete', {'task_ids': [task_id], 'delete_folders': False})
+    return jsonify({'status': 'queued', 'job_id': job['id']}), 202
 
-@app.route('/tasks/clear_completed', methods=['POST']) # 완료된 작업을 json파일에서 일괄 삭제하는 기능 수행
+@app.route('/tasks/clear_completed', methods=['POST']) # 완료된 작업을 일괄 삭제하는 기능 수행
 def clear_completed_tasks():
-    all_tasks = offline_service.list()  # 모든 작업 가져오기
-    for task in all_tasks:
-        if task['status'] == 2:  # 상태 2는 완료된 작업을 나타냅니다.
-            offline_service.remove(task['info_hash'])
-            task_id = task['info_hash']
-            remove_task_time(task_id)  # JSON 파일에서 해당 task_id 삭제
-    return jsonify({'status': 'completed tasks cleared'})
+    job = job_queue.submit('clear_completed', {})
+    return jsonify({'status': 'queued', 'job_id': job['id']}), 202
 
 @app.route('/tasks/<task_id>/delete_with_folder', methods=['DELETE']) # 완료된 작업목록과 폴더를 함께 삭제하는 기능 수행
 def delete_task_and_folder(task_id):
+    logging.info(f"Attempting to delete task and associated folder for task ID: {task_id}")
+    job = job_queue.submit('delete', {'task_ids': [task_id], 'delete_folders': True})
+    return jsonify({'status': 'queued', 'job_id': job['id']}), 202
+
+# 작업 큐 블럭 -------------------------------------------------------------------------
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2')) # 동시에 실행할 작업 수
+JOB_THROTTLE_BACKOFF = int(os.getenv('JOB_THROTTLE_BACKOFF', '300')) # 115가 captcha/호출 제한으로 거부했을 때 큐를 멈추는 시간(초)
+
+def require_p115_clients(task_ids):
+    """ 작업들이 있는 계정의 클라이언트가 준비되지 않았으면 작업을 대기열로 되돌려 나중에 다시 실행합니다. """
+    upstream = task_poller.snapshot.upstream
+    names = {upstream.get(task_id, {}).get('account') for task_id in task_ids}
     try:
-        logging.info(f"Attempting to delete task and associated folder for task ID: {task_id}")
-        # task_times를 로드하고, 해당 task_id에 연관된 파일 ID와 경로 ID를 가져옵니다.
-        task_times = load_task_times()
-        all_tasks = offline_service.list()
-
-        file_id = None
-        wp_path_id = None
-        for task in all_tasks:
-            if task.get('info_hash') == task_id:
-                file_id = task.get('file_id')  # 작업에 연결된 파일 ID를 가져옵니다.
-                wp_path_id = task.get('wp_path_id')  # 작업에 연결된 경로 ID를 가져옵니다.
-                break
-
-        # 파일 삭제 (file_id와 wp_path_id가 모두 존재할 경우)
-        if file_id and wp_path_id:
+        for account in {get_account(name) for name in names}:
+            account.clients.get()
+    except UpstreamUnavailable as e:
+        raise ThrottledError(str(e), retry_after=P115_RETRY_INTERVAL)
+
+def run_delete(payload, job):
+    """ 작업 큐에서 실행: 여러 작업(필요 시 폴더 포함)을 일괄 삭제합니다. """
+    require_p115_clients(payload['task_ids'])
+    results = delete_tasks(payload['task_ids'], delete_folders=payload.get('delete_folders', False), reason=payload.get('reason', 'deleted'))
+    job.report(results)
+    counts = {status: sum(1 for result in results if result['status'] == status) for status in ('deleted', 'failed', 'not_found')}
+    return counts
+
+def run_clear_completed(payload, job):
+    """ 작업 큐에서 실행: 캐시된 스냅샷에서 완료된 작업(상태 2)을 찾아 일괄 삭제합니다. """
+    completed_ids = [task_id for task_id, task in task_poller.wait_ready().upstream.items() if task.get('status') == 2]
+    if not completed_ids:
+        return {'deleted': 0, 'failed': 0, 'not_found': 0}
+    return run_delete({'task_ids': completed_ids}, job)
+
+def publish_job_update(job):
+    """ 작업 상태 변경을 /tasks/stream 구독자에게 전송합니다. (항목별 결과는 /jobs/<id>에서 조회) """
+    summary = {key: job[key] for key in ('id', 'kind', 'status', 'progress', 'error')}
+    event_hub.publish('job', json.dumps(summary, ensure_ascii=False, default=str))
+
+job_queue = JobQueue(TASK_DB_FILE, workers=JOB_WORKERS, throttle_backoff=JOB_THROTTLE_BACKOFF, on_update=publish_job_update)
+job_queue.register('add_bulk', run_bulk_add)
+job_queue.register('delete', run_delete)
+job_queue.register('clear_completed', run_clear_completed)
+job_queue.start() # 재시작 전에 대기 중이던 작업도 이어서 실행
+
+# 보관 정책 블럭 -------------------------------------------------------------------------
+RETENTION_POLICIES = parse_policies(os.getenv('RETENTION_POLICIES', '')) # JSON 배열 (retention.py 참고). 비어 있으면 사용 안 함
+RETENTION_INTERVAL = int(os.getenv('RETENTION_INTERVAL', '300')) # 새 스냅샷이 없어도 정책을 다시 평가하는 주기(초)
+
+def submit_retention_delete(task_ids, delete_folders):
+    return job_queue.submit('delete', {'task_ids': task_ids, 'delete_folders': delete_folders, 'reason': 'retention'})['id']
+
+def retention_job_busy(job_id):
+    job = job_queue.get(job_id)
+    return job is not None and job['status'] in (QUEUED, RUNNING)
+
+retention_scheduler = RetentionScheduler(
+    RETENTION_POLICIES,
+    get_snapshot=lambda: task_poller.snapshot if task_poller.live else None, # 저장된(오래된) 스냅샷으로는 삭제하지 않음
+    submit=submit_retention_delete,
+    is_busy=retention_job_busy,
+    interval=RETENTION_INTERVAL
+)
+task_poller.add_listener(retention_scheduler.on_snapshot)
+retention_scheduler.start()
+
+@app.route('/retention', methods=['GET']) # 보관 정책, 마지막 실행 결과, 지금 평가했을 때 삭제될 작업 목록
+def retention_status():
+    preview = retention_scheduler.preview()
+    return jsonify({
+        'policies': RETENTION_POLICIES,
+        'interval': RETENTION_INTERVAL,
+        'state': retention_scheduler.state,
+        'pending': {'delete_with_folders' if delete_folders else 'delete': task_ids for delete_folders, task_ids in preview.items()},
+    })
+
+@app.route('/stats', methods=['GET']) # 보관소 통계: 폴더별 완료 소요 시간, 일별 완료 용량, 추가->완료 소요 시간 백분위수
+def history_stats():
+    since, until = request.args.get('since'), request.args.get('until')
+    for value in (since, until):
+        if value:
             try:
-                delete_url = "https://webapi.115.com/rb/delete"
-                headers = {
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "Cookie": cookie,
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36 Edg/127.0.0.0",
-                }
-                payload = {
-                    "pid": wp_path_id,
-                    "fid[0]": file_id,
-                    "ignore_warn": "1"
-                }
-                response = requests.post(delete_url, headers=headers, data=payload)
-
-                if response.status_code == 200 and response.json().get("state", False):
-                    logging.info(f"Successfully deleted folder with ID: {file_id} under folder ID: {wp_path_id}")
-                else:
-                    logging.error(f"Failed to delete folder. Response: {response.text}")
-                    # return jsonify({'error': 'Failed to delete folder'}), 500
-
-            except Exception as e:
-                logging.error(f"Error occurred while trying to delete folder with ID: {file_id}, Error: {str(e)}")
-                # return jsonify({'error': f"Exception occurred: {str(e)}"}), 500
-        else:
-            logging.info(f"No folder associated with task ID: {task_id}, skipping folder deletion.")
-            # return jsonify({'error': 'No associated folder found'}), 400
-
-        # 파일 삭제가 실패(폴더가 없어서)하더라도 작업목록은 삭제함
-        offline_service.remove(task_id)
-        remove_task_time(task_id)  # JSON 파일에서 해당 task_id 삭제
-        logging.info(f"Task {task_id} removed from the offline service.")
-
-        return jsonify({'status': 'success'}), 200
-
-    except Exception as e:
-        logging.error(f"Exception occurred while deleting task {task_id} and folder: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': f"Invalid date: {value} (expected YYYY-MM-DD)"}), 400
+    stats = history_archive.stats(since, until)
+    return jsonify(dict(stats, live_tasks=len(task_poller.snapshot.tasks)))
+
+@app.route('/jobs/<job_id>', methods=['GET']) # 작업 큐에 등록된 작업의 상태, 진행 상황, 항목별 결과
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Job {job_id} not found"}), 404
+    job['queue_depth'] = job_queue.depth
+    job['paused_until'] = job_queue.paused_until if job_queue.paused_until > time.time() else None
+    return jsonify(job)
+
+# 메트릭 블럭 -------------------------------------------------------------------------
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() == 'true' # X-Profile 헤더로 요청별 샘플링 프로파일러 사용 허용
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '') # 지정하면 X-Profile 헤더 값이 이 값과 같을 때만 프로파일링
+PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL', '0.005')) # 스택 샘플링 간격(초)
+PROFILE_DIR = os.path.join(DATA_DIR, 'profiles') # 접힌 스택(.folded) 결과 저장 경로
+
+registry.register(Gauge('job_queue_depth', 'Jobs waiting in the job queue.', fn=lambda: job_queue.depth))
+registry.register(Gauge('job_queue_paused', 'Whether the job queue is paused by 115 throttling.',
+                        fn=lambda: int(job_queue.paused_until > time.time())))
+registry.register(Gauge('task_snapshot_version', 'Version of the current task snapshot.', fn=lambda: task_poller.snapshot.version))
+registry.register(Gauge('task_snapshot_age_seconds', 'Seconds since the current task snapshot was built.',
+                        fn=lambda: round(time.time() - task_poller.snapshot.updated_at, 3)))
+registry.register(Gauge('tasks', 'Tasks in the current snapshot by status.', ('status',),
+                        fn=lambda: {('Running',): task_poller.snapshot.running_count, ('Complete',): task_poller.snapshot.complete_count}))
+registry.register(Gauge('account_running_tasks', 'Running tasks per 115 account in the current snapshot.', ('account',),
+                        fn=lambda: {(name,): load['running'] for name, load in dispatcher.state().items()}))
+registry.register(Gauge('sse_subscribers', 'Open /tasks/stream connections.', fn=lambda: event_hub.subscriber_count))
+registry.register(Gauge('folder_index_folders', 'Folders known to the folder index.', fn=lambda: len(folder_index)))
+registry.register(Gauge('warmup_ready', 'Whether background warm-up has finished.', fn=lambda: int(warm_up.ready)))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    profile = request.headers.get('X-Profile')
+    if PROFILER_ENABLED and profile and (not PROFILER_TOKEN or profile == PROFILER_TOKEN):
+        g.profiler = SamplingProfiler(threading.get_ident(), PROFILER_INTERVAL).start()
+        g.profile_path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{uuid.uuid4().hex[:8]}.folded")
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    started = g.pop('request_started', None)
+    if started is not None:
+        http_request_seconds.observe(time.perf_counter() - started, method=request.method, route=route, status=response.status_code)
+
+    if 'profiler' in g:
+        response.headers['X-Profile-File'] = g.profile_path  # 결과는 요청이 끝날 때(teardown) 기록
+    return response
+
+@app.teardown_request
+def stop_request_profiler(exc):
+    """ 처리되지 않은 예외로 after_request가 실행되지 않아도 프로파일러를 멈추고 결과를 기록합니다. """
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        file_path = g.pop('profile_path')
+        try:
+            profiler.write(file_path)
+        except OSError as e:
+            logging.error(f"Error writing profile {file_path}: {e}")
+
+@app.route('/metrics', methods=['GET']) # Prometheus 텍스트 형식의 메트릭
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    if os.getenv('SERVER', 'waitress') == 'waitress':
+        # 운영 모드: 여러 요청(/tasks, 폴더 탐색, SSE 스트림)을 스레드 풀에서 동시에 처리
+        # 백그라운드 폴러와 캐시는 프로세스 단위이므로 워커 프로세스가 아닌 스레드 수로 확장합니다.
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=int(os.getenv('PORT', '5000')), threads=int(os.getenv('SERVER_THREADS', '16')))
+    else:
+        app.run(host='0.0.0.0', port=int(os.getenv('PORT', '5000')), threaded=True)
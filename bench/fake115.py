@@ -0,0 +1,317 @@
+""" 벤치마크용 가짜 115 서버.
+
+실제 115 계정 없이 성능을 측정할 수 있도록 앱이 사용하는 API만 흉내냅니다.
+  - 오프라인 작업 목록/삭제:  GET /lixian/?ac=task_lists&page=N, POST /lixian/?ac=task_del
+  - 오프라인 작업 추가:       POST /web/lixian/?ct=lixian&ac=add_task_url(s)  (api115.Web115Client)
+  - 오프라인 할당량:          GET /web/lixian/?ct=lixian&ac=get_quota_package_info
+  - 파일 삭제:               POST /rb/delete                                 (api115.Web115Client)
+  - 디렉토리 조회:           GET /files?cid=&offset=&limit=, GET /files/attr?id=
+  - 통계/설정:               GET /__stats, POST /__reset, POST /__config (JSON: latency, jitter, error_rate)
+
+사용 예:
+    python bench/fake115.py --tasks 50000 --folders 2000 --depth 12 --latency 0.05 --error-rate 0.01
+"""
+import sys
+import json
+import socket
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+TASK_PAGE_SIZE = 30  # 115 task_lists 한 페이지의 작업 수
+BASE_TIME = 1700000000
+
+
+class Fake115:
+    """ 가짜 115의 데이터(작업, 폴더 트리, 파일)와 호출 통계. """
+
+    def __init__(self, tasks=1000, folders=200, depth=8, complete_ratio=0.7, latency=0.0, jitter=0.5,
+                 error_rate=0.0, seed=115, quota=5000):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = {}  # {op: 호출 수}
+        self.errors = {}  # {op: 일부러 실패시킨 호출 수}
+        self.quota = quota  # 오프라인 다운로드 할당량 (추가된 작업마다 1씩 사용)
+        self.quota_used = 0
+
+        # 폴더 트리: 루트 아래에 depth 깊이의 사슬을 만들고, 나머지 폴더는 기존 폴더들 아래에 무작위로 붙임
+        self.folders = {0: {'id': 0, 'parent_id': 0, 'name': '', 'path': '/'}}
+        self.children = {0: []}
+        parent = 0
+        for level in range(min(depth, folders)):
+            parent = self._add_folder(parent, f"level{level}")
+        while len(self.folders) - 1 < folders:
+            self._add_folder(self.random.choice(list(self.folders)), f"folder{len(self.folders)}")
+
+        # 작업: 무작위 폴더에 저장되며, 완료된 작업은 해당 폴더에 결과 파일(폴더)을 가짐
+        self.tasks = {}  # {info_hash: task}
+        self.files = {}  # {file_id: {'id', 'parent_id', 'name', 'etime', 'info_hash'}}
+        self.files_by_parent = {}  # {folder_id: {file_id: file}}
+        self._task_order = None  # 최신순으로 정렬된 작업 목록 (작업이 바뀌면 다시 정렬)
+        folder_ids = [folder_id for folder_id in self.folders if folder_id]
+        for i in range(tasks):
+            self._add_task(f"magnet:?xt=urn:btih:{hashlib.sha1(f'bench-{seed}-{i}'.encode()).hexdigest()}",
+                           self.random.choice(folder_ids) if folder_ids else 0,
+                           complete=self.random.random() < complete_ratio, add_time=BASE_TIME + i)
+
+    # 데이터 생성 ---------------------------------------------------------------
+    def _add_folder(self, parent_id, name):
+        folder_id = 1000 + len(self.folders)
+        parent_path = self.folders[parent_id]['path']
+        path = f"{parent_path.rstrip('/')}/{name}"
+        self.folders[folder_id] = {'id': folder_id, 'parent_id': parent_id, 'name': name, 'path': path}
+        self.children[folder_id] = []
+        self.children[parent_id].append(folder_id)
+        return folder_id
+
+    def _add_task(self, url, wp_path_id, complete=False, add_time=None):
+        info_hash = hashlib.sha1(url.encode()).hexdigest()
+        if 'btih:' in url:
+            info_hash = url.split('btih:')[1].split('&')[0].lower()
+        if info_hash in self.tasks:
+            return None
+        name = f"task-{info_hash[:8]}"
+        add_time = add_time or int(time.time())
+        file_id = str(9000000 + len(self.files) + len(self.tasks))
+        task = {
+            'info_hash': info_hash, 'name': name, 'size': self.random.randint(1, 50) * 1024 ** 3,
+            'add_time': add_time, 'last_update': add_time + 600,
+            'percentDone': 100 if complete else self.random.randint(0, 99), 'status': 2 if complete else 1,
+            'wp_path_id': str(wp_path_id), 'file_id': file_id,
+            'del_path': f"{self.folders.get(int(wp_path_id), self.folders[0])['path'].rstrip('/')}/{name}/",
+        }
+        self.tasks[info_hash] = task
+        self._task_order = None
+        if complete:
+            file = {'id': file_id, 'parent_id': int(wp_path_id), 'name': name, 'etime': add_time + 3600, 'info_hash': info_hash}
+            self.files[file_id] = file
+            self.files_by_parent.setdefault(file['parent_id'], {})[file_id] = file
+        return task
+
+    # 공통 처리 -----------------------------------------------------------------
+    def begin(self, op):
+        """ 호출 수를 기록하고 설정된 지연을 적용합니다. error_rate 확률로 False(실패시킬 호출)를 반환. """
+        with self.lock:
+            self.calls[op] = self.calls.get(op, 0) + 1
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors[op] = self.errors.get(op, 0) + 1
+            delay = self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter) if self.latency else 0
+        if delay > 0:
+            time.sleep(delay)
+        return not fail
+
+    def stats(self):
+        with self.lock:
+            return {'calls': dict(self.calls), 'errors': dict(self.errors), 'tasks': len(self.tasks),
+                    'folders': len(self.folders) - 1, 'files': len(self.files)}
+
+    # API -----------------------------------------------------------------------
+    def task_lists(self, page):
+        with self.lock:
+            if self._task_order is None:
+                self._task_order = sorted(self.tasks.values(), key=lambda task: -task['add_time'])
+            tasks = self._task_order
+        page_count = max(1, (len(tasks) + TASK_PAGE_SIZE - 1) // TASK_PAGE_SIZE)
+        start = (page - 1) * TASK_PAGE_SIZE
+        return {'state': True, 'page': page, 'page_count': page_count, 'count': len(tasks),
+                'tasks': tasks[start:start + TASK_PAGE_SIZE]}
+
+    def task_del(self, hashes):
+        with self.lock:
+            for info_hash in hashes:
+                self.tasks.pop(info_hash, None)
+            self._task_order = None
+        return {'state': True}
+
+    def add_task_urls(self, urls, wp_path_id):
+        results = []
+        with self.lock:
+            for url in urls:
+                task = self._add_task(url, int(wp_path_id or 0))
+                if task is None:
+                    results.append({'state': False, 'errcode': 10008, 'error_msg': 'task exists', 'url': url})
+                else:
+                    self.quota_used += 1
+                    results.append({'state': True, 'info_hash': task['info_hash'], 'name': task['name'],
+                                    'size': task['size'], 'url': url})
+        return {'state': True, 'result': results}
+
+    def quota_info(self):
+        with self.lock:
+            return {'state': True, 'count': self.quota, 'used': self.quota_used, 'surplus': max(0, self.quota - self.quota_used)}
+
+    def rb_delete(self, file_ids):
+        with self.lock:
+            for file_id in file_ids:
+                file = self.files.pop(file_id, None)
+                if file is not None:
+                    self.files_by_parent[file['parent_id']].pop(file_id, None)
+                self._remove_folder(file_id)
+        return {'state': True}
+
+    def _remove_folder(self, folder_id):
+        try:
+            folder_id = int(folder_id)
+        except ValueError:
+            return
+        folder = self.folders.pop(folder_id, None)
+        if folder is None:
+            return
+        siblings = self.children.get(folder['parent_id'])
+        if siblings and folder_id in siblings:
+            siblings.remove(folder_id)
+        for child_id in self.children.pop(folder_id, []):
+            self._remove_folder(child_id)
+
+    def list_files(self, cid, offset, limit):
+        with self.lock:
+            entries = [dict(self.folders[child_id], is_directory=True, etime=BASE_TIME)
+                       for child_id in self.children.get(cid, [])]
+            entries += [dict(file, is_directory=False) for file in self.files_by_parent.get(cid, {}).values()]
+        return {'state': True, 'count': len(entries), 'offset': offset, 'data': entries[offset:offset + limit]}
+
+    def attr(self, folder_id):
+        with self.lock:
+            folder = self.folders.get(folder_id)
+        if folder is None:
+            return {'state': False, 'error': 'not found'}
+        return {'state': True, 'data': dict(folder, is_directory=True, etime=BASE_TIME)}
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive (Web115Client의 연결 재사용을 측정하기 위함)
+
+        def setup(self):
+            super().setup()
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # 헤더/본문 분할 전송 시 지연(Nagle) 방지
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _form(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length).decode() if length else ''
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                return json.loads(body or '{}')
+            return {key: values[0] for key, values in parse_qs(body).items()}
+
+        @staticmethod
+        def _indexed(form, name):
+            """ url[0], url[1], ... 형식의 폼 값을 순서대로 모읍니다. """
+            values = []
+            while f"{name}[{len(values)}]" in form:
+                values.append(form[f"{name}[{len(values)}]"])
+            return values
+
+        def _route(self, method):
+            parsed = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+            form = self._form() if method == 'POST' else {}
+            path, action = parsed.path.rstrip('/') or '/', query.get('ac')
+
+            if path == '/__stats':
+                return 200, fake.stats()
+            if path == '/__reset':
+                with fake.lock:
+                    fake.calls.clear()
+                    fake.errors.clear()
+                return 200, {'state': True}
+            if path == '/__config':
+                for key in ('latency', 'jitter', 'error_rate'):
+                    if key in form:
+                        setattr(fake, key, float(form[key]))
+                return 200, {'state': True}
+
+            routes = {
+                ('GET', '/lixian', 'task_lists'): ('task_lists', lambda: fake.task_lists(int(query.get('page', 1)))),
+                ('POST', '/lixian', 'task_del'): ('task_del', lambda: fake.task_del(self._indexed(form, 'hash'))),
+                ('POST', '/web/lixian', 'add_task_url'): ('add_task_url', lambda: fake.add_task_urls([form['url']], form.get('wp_path_id'))),
+                ('POST', '/web/lixian', 'add_task_urls'): ('add_task_urls', lambda: fake.add_task_urls(self._indexed(form, 'url'), form.get('wp_path_id'))),
+                ('GET', '/web/lixian', 'get_quota_package_info'): ('offline_quota', fake.quota_info),
+                ('POST', '/rb/delete', None): ('rb_delete', lambda: fake.rb_delete(self._indexed(form, 'fid'))),
+                ('GET', '/files', None): ('files', lambda: fake.list_files(int(query.get('cid', 0)), int(query.get('offset', 0)), int(query.get('limit', 1150)))),
+                ('GET', '/files/attr', None): ('files_attr', lambda: fake.attr(int(query.get('id', 0)))),
+            }
+            route = routes.get((method, path, action if path in ('/lixian', '/web/lixian') else None))
+            if route is None:
+                return 404, {'state': False, 'error': f"Unknown endpoint {method} {self.path}"}
+            op, handler = route
+            if not fake.begin(op):
+                return 503, {'state': False, 'error': 'injected error'}
+            return 200, handler()
+
+        def do_GET(self):
+            self._send(*self._route('GET'))
+
+        def do_POST(self):
+            self._send(*self._route('POST'))
+
+    return Handler
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        """ 클라이언트가 keep-alive 연결을 끊는 것은 정상이므로 출력하지 않습니다. """
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def serve(fake, host='127.0.0.1', port=8115):
+    """ 백그라운드 스레드에서 가짜 115 서버를 시작하고 서버 객체를 반환합니다. """
+    server = QuietHTTPServer((host, port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, name='fake115', daemon=True).start()
+    return server
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument('--tasks', type=int, default=1000, help='작업 수 (10 ~ 50000)')
+    parser.add_argument('--folders', type=int, default=200, help='폴더 수')
+    parser.add_argument('--depth', type=int, default=8, help='가장 깊은 폴더 경로의 깊이')
+    parser.add_argument('--complete-ratio', type=float, default=0.7, help='완료된 작업 비율')
+    parser.add_argument('--latency', type=float, default=0.0, help='115 호출당 평균 지연(초)')
+    parser.add_argument('--jitter', type=float, default=0.5, help='지연 편차 비율 (0.5 = ±50%%)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503으로 실패시킬 호출 비율')
+    parser.add_argument('--quota', type=int, default=5000, help='오프라인 다운로드 할당량')
+    parser.add_argument('--seed', type=int, default=115)
+
+
+def fake_from_args(args, index=0, count=1):
+    """ count개 계정 중 index번째 계정의 가짜 115. 작업은 계정 수로 나누고 계정마다 다른 seed를 사용합니다. """
+    tasks = args.tasks // count + (args.tasks % count if index == 0 else 0)
+    return Fake115(tasks=tasks, folders=args.folders, depth=args.depth, complete_ratio=args.complete_ratio,
+                   latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed + index, quota=args.quota)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='가짜 115 서버')
+    add_dataset_arguments(parser)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8115)
+    args = parser.parse_args()
+    fake = fake_from_args(args)
+    server = serve(fake, args.host, args.port)
+    print(f"Fake 115 listening on http://{args.host}:{args.port} ({fake.stats()})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,230 @@
+""" 가짜 115 서버를 상대로 앱의 주요 엔드포인트를 측정하는 벤치마크.
+
+가짜 115 서버(bench/fake115.py)를 이 프로세스에서 띄우고, 앱(app.py)은 별도 프로세스로
+p115 대체 모듈(bench/shim)과 임시 DATA_DIR을 사용해 실행한 뒤, 시나리오별로
+처리량(req/s), p50/p99 지연, 요청당 115 호출 수를 출력합니다.
+
+사용 예:
+    python bench/run_bench.py --tasks 10000 --folders 1000 --depth 12 --latency 0.02
+    python bench/run_bench.py --tasks 50000 --scenarios tasks_full,tasks_page --requests 500 --concurrency 16 --json result.json
+    python bench/run_bench.py --accounts 3 --latency 0.05 --scenarios tasks_refresh,add_bulk   (계정마다 가짜 115 서버 하나)
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from fake115 import serve, add_dataset_arguments, fake_from_args  # noqa: E402
+
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def random_magnet(rng):
+    return f"magnet:?xt=urn:btih:{hashlib.sha1(str(rng.random()).encode()).hexdigest()}"
+
+
+def wait_for_job(base, job_id, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(f"{base}/jobs/{job_id}", timeout=10).json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+
+def build_scenarios(fake, args):
+    """ {이름: (요청 함수(session, base, rng) -> status_code, 요청 수, 동시성)} """
+    rng_folders = [folder for folder_id, folder in fake.folders.items() if folder_id]
+    deepest = max(rng_folders, key=lambda folder: folder['path'].count('/'))['path'] if rng_folders else '/'
+    default_folder = str(rng_folders[0]['id']) if rng_folders else '0'
+    slow_requests = max(1, min(args.requests, args.slow_requests))
+
+    def tasks_full(session, base, rng):
+        return session.get(f"{base}/tasks").status_code
+
+    def tasks_page(session, base, rng):
+        return session.get(f"{base}/tasks", params={'status': 'Running', 'sort': 'size', 'order': 'desc', 'limit': 50}).status_code
+
+    def tasks_refresh(session, base, rng):  # 115 목록 전체 조회 + 완료 시간 조회 + 작업 기록 저장
+        return session.post(f"{base}/tasks/refresh").status_code
+
+    def folders_browse(session, base, rng):
+        folder = rng.choice(rng_folders)
+        return session.post(f"{base}/folders", json={'folder_id': str(folder['id'])}).status_code
+
+    def folders_deep_path(session, base, rng):
+        return session.post(f"{base}/folders", json={'path': deepest}).status_code
+
+    def add_tasks(session, base, rng):  # /tasks/add: 링크 10개를 한 번에 동기 추가
+        urls = ','.join(random_magnet(rng) for _ in range(10))
+        return session.post(f"{base}/tasks/add", json={'urls': urls, 'wp_path_id': default_folder}).status_code
+
+    def add_bulk(session, base, rng):  # /tasks/add_bulk: 링크 100개, 작업 큐 완료까지 측정
+        links = '\n'.join(random_magnet(rng) for _ in range(100))
+        response = session.post(f"{base}/tasks/add_bulk", json={'links': links, 'wp_path_id': default_folder})
+        if response.status_code != 202:
+            return response.status_code
+        job = wait_for_job(base, response.json()['job_id'])
+        return 200 if job['status'] == 'done' else 500
+
+    return {
+        'tasks_full': (tasks_full, args.requests, args.concurrency),
+        'tasks_page': (tasks_page, args.requests, args.concurrency),
+        'tasks_refresh': (tasks_refresh, slow_requests, 1),
+        'folders_browse': (folders_browse, args.requests, args.concurrency),
+        'folders_deep_path': (folders_deep_path, args.requests, args.concurrency),
+        'add_tasks': (add_tasks, slow_requests, args.concurrency),
+        'add_bulk': (add_bulk, slow_requests, 1),
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def run_scenario(base, fake_bases, request_fn, count, concurrency, seed):
+    for fake_base in fake_bases:
+        requests.post(f"{fake_base}/__reset", timeout=10)
+    sessions = [requests.Session() for _ in range(concurrency)]
+
+    def one(i):
+        rng = random.Random(seed + i)
+        started = time.perf_counter()
+        try:
+            status = request_fn(sessions[i % concurrency], base, rng)
+        except requests.RequestException:
+            status = 'error'
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(count)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    upstream = {'calls': {}, 'errors': {}}  # 모든 계정(가짜 서버)의 호출 수 합계
+    for fake_base in fake_bases:
+        stats = requests.get(f"{fake_base}/__stats", timeout=10).json()
+        for key in ('calls', 'errors'):
+            for op, value in stats[key].items():
+                upstream[key][op] = upstream[key].get(op, 0) + value
+    return {
+        'requests': count,
+        'concurrency': concurrency,
+        'errors': sum(1 for _, status in results if status == 'error' or status >= 400),
+        'throughput': round(count / elapsed, 2) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'upstream_calls_per_request': {op: round(calls / count, 2) for op, calls in sorted(upstream['calls'].items())},
+        'upstream_errors': upstream['errors'],
+    }
+
+
+def start_app(args, fake_bases, data_dir, default_folders):
+    fake_base = fake_bases[0]
+    env = dict(os.environ)
+    env.update({
+        'PYTHONPATH': os.pathsep.join([os.path.join(BENCH_DIR, 'shim'), REPO_DIR]),
+        'FAKE115_URL': fake_base,
+        'API115_WEB_BASE': fake_base,
+        'API115_WEBAPI_BASE': fake_base,
+        'API115_RATE': str(args.api_rate),
+        'DATA_DIR': data_dir,
+        'PORT': str(args.port),
+        'SERVER': args.server,
+        'C_FolderId': default_folders[0],
+        'TASK_POLL_INTERVAL': '86400',  # 측정 중 백그라운드 조회가 끼어들지 않도록
+        'LOG_LEVEL': 'WARNING',
+    })
+    if len(fake_bases) > 1:  # 계정마다 다른 가짜 서버 (shim은 URL 형식의 cookie를 서버 주소로 사용)
+        env['P115_ACCOUNTS'] = json.dumps([
+            {'name': f"account{i + 1}", 'cookie': url, 'web_base': url, 'webapi_base': url, 'folder_id': folder_id}
+            for i, (url, folder_id) in enumerate(zip(fake_bases, default_folders))
+        ])
+    log = open(os.path.join(data_dir, 'app.log'), 'w')
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, 'app.py')], cwd=REPO_DIR, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{args.port}"
+    started = time.time()
+    while time.time() - started < args.ready_timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode}; see {log.name}")
+        try:
+            if requests.get(f"{base}/readyz", timeout=2).status_code == 200:
+                print(f"App ready in {time.time() - started:.2f}s")
+                return process, base
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise TimeoutError(f"App was not ready within {args.ready_timeout}s; see {log.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 115 서버를 상대로 한 벤치마크')
+    add_dataset_arguments(parser)
+    parser.add_argument('--scenarios', default='all', help='쉼표로 구분한 시나리오 이름 (기본: 전체)')
+    parser.add_argument('--requests', type=int, default=200, help='시나리오별 요청 수')
+    parser.add_argument('--slow-requests', type=int, default=5, help='refresh/add 시나리오의 요청 수')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--port', type=int, default=5599, help='앱 포트')
+    parser.add_argument('--fake-port', type=int, default=8115, help='가짜 115 서버 포트 (계정이 여럿이면 계정마다 1씩 증가)')
+    parser.add_argument('--accounts', type=int, default=1, help='115 계정 수 (계정마다 가짜 서버를 띄우고 작업을 나눔)')
+    parser.add_argument('--server', default='waitress', choices=('waitress', 'flask'))
+    parser.add_argument('--api-rate', type=float, default=0, help='API115_RATE (0이면 속도 제한 없음)')
+    parser.add_argument('--ready-timeout', type=float, default=600)
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장')
+    args = parser.parse_args()
+
+    fakes = [fake_from_args(args, i, args.accounts) for i in range(max(1, args.accounts))]
+    servers = [serve(fake, port=args.fake_port + i) for i, fake in enumerate(fakes)]
+    fake_bases = [f"http://127.0.0.1:{args.fake_port + i}" for i in range(len(fakes))]
+    fake = fakes[0]  # 기본 계정 (폴더 탐색 시나리오 기준)
+    for i, account_fake in enumerate(fakes):
+        print(f"Fake 115 #{i + 1}: {account_fake.stats()}")
+
+    scenarios = build_scenarios(fake, args)
+    names = list(scenarios) if args.scenarios == 'all' else args.scenarios.split(',')
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)} (available: {', '.join(scenarios)})")
+
+    default_folders = [next((str(folder_id) for folder_id in account_fake.folders if folder_id), '0') for account_fake in fakes]
+    with tempfile.TemporaryDirectory(prefix='bench-115-') as data_dir:
+        process, base = start_app(args, fake_bases, data_dir, default_folders)
+        results = {}
+        try:
+            print(f"{'scenario':<20}{'reqs':>6}{'conc':>6}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  upstream calls/req")
+            for name in names:
+                request_fn, count, concurrency = scenarios[name]
+                result = results[name] = run_scenario(base, fake_bases, request_fn, count, concurrency, args.seed)
+                calls = ', '.join(f"{op}={value}" for op, value in result['upstream_calls_per_request'].items()) or '-'
+                print(f"{name:<20}{result['requests']:>6}{result['concurrency']:>6}{result['errors']:>5}"
+                      f"{result['throughput']:>10}{result['p50_ms']:>10}{result['p99_ms']:>10}  {calls}")
+        finally:
+            process.terminate()
+            process.wait(10)
+            for server in servers:
+                server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'dataset': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+""" 벤치마크용 p115 대체 모듈.
+
+PYTHONPATH=bench/shim 으로 실행하면 app.py의 `from p115 import ...`가 이 모듈을 사용하며,
+앱이 사용하는 메서드만 가짜 115 서버(FAKE115_URL, 기본 http://127.0.0.1:8115)로 HTTP 호출합니다.
+cookie가 http(s) URL이면 그 주소의 가짜 서버를 사용합니다. (계정마다 다른 가짜 서버를 쓰는 다중 계정 측정용)
+"""
+import os
+from datetime import datetime
+
+import requests
+
+FAKE115_URL = os.getenv('FAKE115_URL', 'http://127.0.0.1:8115').rstrip('/')
+LIST_PAGE_SIZE = 1150  # p115의 iterdir 페이지 크기와 비슷하게
+
+
+class P115Client:
+    def __init__(self, cookie=None):
+        self.session = requests.Session()
+        self.base = cookie.rstrip('/') if cookie and cookie.startswith(('http://', 'https://')) else FAKE115_URL
+
+    def request(self, method, path, **kwargs):
+        response = self.session.request(method, f"{self.base}{path}", timeout=30, **kwargs)
+        response.raise_for_status()
+        data = response.json()
+        if not data.get('state', True):
+            if data.get('error') == 'not found':
+                raise FileNotFoundError(data['error'])  # p115와 같이 없는 파일/폴더는 FileNotFoundError
+            raise OSError(data.get('error', 'fake 115 error'))
+        return data
+
+
+class P115Offline:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self):
+        """ 모든 페이지를 차례로 조회해 전체 작업 목록을 반환합니다. (p115와 같이 페이지당 1회 호출) """
+        tasks = []
+        page = 1
+        while True:
+            data = self.client.request('GET', '/lixian/', params={'ct': 'lixian', 'ac': 'task_lists', 'page': page})
+            tasks.extend(data['tasks'])
+            if page >= data['page_count']:
+                return tasks
+            page += 1
+
+    def remove(self, hashes, *args, **kwargs):
+        hashes = [hashes] if isinstance(hashes, str) else list(hashes)
+        data = {f"hash[{i}]": info_hash for i, info_hash in enumerate(hashes)}
+        return self.client.request('POST', '/lixian/?ct=lixian&ac=task_del', data=data)
+
+
+class P115FileSystem:
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _to_attr(entry):
+        return dict(entry, etime=datetime.fromtimestamp(entry['etime']))
+
+    def attr(self, folder_id):
+        return self._to_attr(self.client.request('GET', '/files/attr', params={'id': int(folder_id)})['data'])
+
+    def iterdir(self, folder_id=0, **kwargs):
+        offset = 0
+        while True:
+            data = self.client.request('GET', '/files', params={'cid': int(folder_id), 'offset': offset, 'limit': LIST_PAGE_SIZE})
+            for entry in data['data']:
+                yield self._to_attr(entry)
+            offset += len(data['data'])
+            if not data['data'] or offset >= data['count']:
+                return
+
+    def listdir_attr(self, folder_id=0, **kwargs):
+        return list(self.iterdir(folder_id))
@@ -0,0 +1,50 @@
+import queue
+import threading
+
+# 이벤트 전달 블럭 --------------------------------------------------------------
+# Server-Sent Events 구독자들에게 이벤트를 나눠주는 허브.
+# 이벤트 데이터는 발행 시 한 번만 직렬화하고, 구독자마다 작은 큐를 둡니다.
+
+RESYNC = 'resync'  # 큐가 넘친 구독자에게 전체 스냅샷을 다시 보내라는 표시
+
+
+def format_sse(event, data, event_id=None):
+    """ SSE 형식의 문자열을 만듭니다. data는 이미 직렬화된 문자열. """
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.extend(f"data: {line}" for line in data.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventHub:
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event, data, event_id=None):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data, event_id))
+            except queue.Full:
+                # 느린 구독자는 밀린 이벤트를 버리고 전체 스냅샷으로 다시 맞춥니다.
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait((RESYNC, None, None))
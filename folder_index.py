@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# 폴더 인덱스 블럭 --------------------------------------------------------------
+# 폴더 ID <-> 경로 양방향 매핑과 부모/자식 관계를 메모리에 유지합니다.
+# 하위 폴더 목록은 노드별 만료 시각(TTL)을 가지며, 폴더 생성/삭제 시 무효화합니다.
+# 부모 목록에서 본 폴더의 수정 시각(mtime, 115의 etime)과 하위 목록을 조회했을 때의 수정 시각(listed_mtime)을 함께 보관해
+# 크롤러가 바뀌지 않은 폴더는 다시 조회하지 않도록 합니다.
+# 파일에는 [id, parent_id, name, path, expires_at, mtime, listed_mtime] 배열로 압축 저장하고, 처음 사용할 때 로드합니다.
+
+ROOT_ID = '0'
+FILE_VERSION = 2
+
+
+class FolderIndex:
+    def __init__(self, file_path, ttl=600):
+        self.file_path = file_path
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # 동시에 저장하면 같은 임시 파일을 덮어쓰므로 파일 쓰기는 한 번에 하나씩
+        self._nodes = None  # {id: {'name', 'parent_id', 'path', 'children', 'expires_at'}}
+        self._path_to_id = None
+        self.version = 0  # 인덱스가 바뀔 때마다 증가
+
+    # 로드/저장 -------------------------------------------------------------
+    def _ensure_loaded(self):
+        if self._nodes is not None:
+            return
+        self._nodes = {ROOT_ID: self._new_node('', ROOT_ID, '/')}
+        self._path_to_id = {'/': ROOT_ID}
+        if not os.path.exists(self.file_path):
+            return
+
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to load folder index from {self.file_path}: {e}")
+            return
+
+        if not isinstance(data, dict) or data.get('version') != FILE_VERSION:
+            logging.info("Ignoring folder mapping file in the old format; it will be rebuilt on demand.")
+            return
+
+        for row in data.get('nodes', []):
+            folder_id, parent_id, name, path, expires_at = row[:5]
+            mtime, listed_mtime = (list(row[5:7]) + [None, None])[:2]  # 수정 시각이 없는 이전 파일도 읽음
+            node = self._nodes.setdefault(folder_id, self._new_node(name, parent_id, path))
+            node.update(name=name, parent_id=parent_id, path=path, expires_at=expires_at, mtime=mtime, listed_mtime=listed_mtime)
+            self._path_to_id[path] = folder_id
+        for folder_id, node in self._nodes.items():  # 자식 목록은 부모 링크로부터 복원
+            if folder_id != ROOT_ID and node['parent_id'] in self._nodes:
+                parent = self._nodes[node['parent_id']]
+                if parent['children'] is None:
+                    parent['children'] = []
+                parent['children'].append(folder_id)
+        self._nodes[ROOT_ID]['expires_at'] = data.get('root_expires_at', 0)
+        for node in self._nodes.values():  # 하위 목록을 조회한 적 없는 노드는 자식 목록을 신뢰하지 않음
+            if not node['expires_at']:
+                node['children'] = None
+            elif node['children'] is None:
+                node['children'] = []
+        logging.info(f"Folder index loaded from file ({len(self._nodes)} folders).")
+
+    def save(self):
+        with self._lock:
+            self._ensure_loaded()
+            nodes = [[folder_id, node['parent_id'], node['name'], node['path'], node['expires_at'], node['mtime'], node['listed_mtime']]
+                     for folder_id, node in self._nodes.items() if folder_id != ROOT_ID]
+            root_expires = self._nodes[ROOT_ID]['expires_at']
+        tmp_path = f"{self.file_path}.tmp"
+        with self._save_lock:
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': FILE_VERSION, 'root_expires_at': root_expires, 'nodes': nodes}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.file_path)
+
+    @staticmethod
+    def _new_node(name, parent_id, path):
+        return {'name': name, 'parent_id': parent_id, 'path': path, 'children': None, 'expires_at': 0,
+                'mtime': None, 'listed_mtime': None}
+
+    # 조회 ------------------------------------------------------------------
+    def get(self, folder_id):
+        with self._lock:
+            self._ensure_loaded()
+            node = self._nodes.get(str(folder_id))
+            return dict(node, id=str(folder_id)) if node else None
+
+    def path_of(self, folder_id):
+        with self._lock:
+            self._ensure_loaded()
+            node = self._nodes.get(str(folder_id))
+            return node['path'] if node else None
+
+    def id_of(self, path):
+        with self._lock:
+            self._ensure_loaded()
+            return self._path_to_id.get(normalize_path(path))
+
+    def children(self, folder_id):
+        """ 유효한(만료되지 않은) 하위 폴더 목록을 반환합니다. 없거나 만료되었으면 None. """
+        with self._lock:
+            self._ensure_loaded()
+            node = self._nodes.get(str(folder_id))
+            if not node or node['children'] is None or node['expires_at'] < time.time():
+                return None
+            return [{'id': child_id, 'name': self._nodes[child_id]['name'], 'path': self._nodes[child_id]['path']}
+                    for child_id in node['children']]
+
+    def unchanged_children(self, folder_id):
+        """ 하위 목록을 조회한 뒤 폴더의 수정 시각이 바뀌지 않았으면 저장된 하위 목록을 반환하고 만료 시각을 연장합니다.
+            수정 시각을 모르거나 바뀌었거나 하위 목록이 없으면 None. """
+        with self._lock:
+            self._ensure_loaded()
+            node = self._nodes.get(str(folder_id))
+            if not node or node['children'] is None or node['mtime'] is None or node['mtime'] != node['listed_mtime']:
+                return None
+            node['expires_at'] = time.time() + self.ttl
+            return [{'id': child_id, 'name': self._nodes[child_id]['name'], 'path': self._nodes[child_id]['path']}
+                    for child_id in node['children']]
+
+    def nodes(self):
+        """ 루트를 제외한 모든 폴더의 (id, name, path) 목록. (검색 인덱스 생성용) """
+        with self._lock:
+            self._ensure_loaded()
+            return [(folder_id, node['name'], node['path']) for folder_id, node in self._nodes.items() if folder_id != ROOT_ID]
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._nodes) - 1
+
+    # 갱신 ------------------------------------------------------------------
+    def add_node(self, folder_id, name, parent_id, path=None):
+        """ 폴더 한 개를 등록합니다. 부모가 인덱스에 있으면 부모 경로로부터 경로를 계산합니다. """
+        folder_id, parent_id = str(folder_id), str(parent_id)
+        if folder_id == ROOT_ID:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            parent = self._nodes.get(parent_id)
+            if parent:
+                path = join_path(parent['path'], name)
+            node = self._nodes.get(folder_id)
+            if node is None:
+                node = self._nodes[folder_id] = self._new_node(name, parent_id, normalize_path(path or f"/{name}"))
+                self._path_to_id[node['path']] = folder_id
+            elif node['name'] != name or node['parent_id'] != parent_id or (path and node['path'] != normalize_path(path)):
+                self._detach(folder_id)
+                node.update(name=name, parent_id=parent_id)
+                self._move(folder_id, normalize_path(path or f"/{name}"))
+            else:
+                return
+            if parent and parent['children'] is not None and folder_id not in parent['children']:
+                parent['children'].append(folder_id)
+            self.version += 1
+
+    def set_children(self, folder_id, entries, ttl=None):
+        """ folder_id의 하위 폴더 목록을 entries([(id, name) 또는 (id, name, mtime), ...])로 교체하고 만료 시각을 갱신합니다. """
+        folder_id = str(folder_id)
+        with self._lock:
+            self._ensure_loaded()
+            parent = self._nodes.get(folder_id)
+            if parent is None:
+                return
+            new_ids = [str(entry[0]) for entry in entries]
+            for stale_id in set(parent['children'] or []) - set(new_ids):
+                self._remove_subtree(stale_id)
+            parent['children'] = []
+            for entry in entries:
+                self.add_node(entry[0], entry[1], folder_id)
+                if len(entry) > 2 and str(entry[0]) in self._nodes:
+                    self._nodes[str(entry[0])]['mtime'] = entry[2]
+            parent['children'] = new_ids
+            parent['expires_at'] = time.time() + (self.ttl if ttl is None else ttl)
+            parent['listed_mtime'] = parent['mtime']
+            self.version += 1
+
+    def invalidate(self, folder_id):
+        """ 하위 폴더 목록을 만료시켜 다음 조회 때 다시 가져오도록 합니다. """
+        with self._lock:
+            self._ensure_loaded()
+            node = self._nodes.get(str(folder_id))
+            if node:
+                node['expires_at'] = 0
+                node['listed_mtime'] = None  # 크롤러도 수정 시각과 관계없이 다시 조회
+                self.version += 1
+
+    def remove(self, folder_id):
+        """ 삭제된 폴더와 그 하위 폴더들을 인덱스에서 제거합니다. """
+        folder_id = str(folder_id)
+        with self._lock:
+            self._ensure_loaded()
+            if folder_id in self._nodes and folder_id != ROOT_ID:
+                self._detach(folder_id)
+                self._remove_subtree(folder_id)
+                self.version += 1
+
+    # 내부 처리 -------------------------------------------------------------
+    def _detach(self, folder_id):
+        node = self._nodes[folder_id]
+        parent = self._nodes.get(node['parent_id'])
+        if parent and parent['children'] and folder_id in parent['children']:
+            parent['children'].remove(folder_id)
+
+    def _remove_subtree(self, folder_id):
+        node = self._nodes.pop(folder_id, None)
+        if node is None:
+            return
+        if self._path_to_id.get(node['path']) == folder_id:
+            del self._path_to_id[node['path']]
+        for child_id in node['children'] or []:
+            self._remove_subtree(child_id)
+
+    def _move(self, folder_id, path):
+        """ 이름/위치가 바뀐 폴더와 하위 폴더들의 경로를 다시 계산합니다. """
+        node = self._nodes[folder_id]
+        if self._path_to_id.get(node['path']) == folder_id:
+            del self._path_to_id[node['path']]
+        node['path'] = path
+        self._path_to_id[path] = folder_id
+        for child_id in node['children'] or []:
+            if child_id in self._nodes:
+                self._move(child_id, join_path(path, self._nodes[child_id]['name']))
+
+
+def folder_mtime(attr):
+    """ 115 파일 속성의 수정 시각(etime 또는 mtime)을 타임스탬프로 변환합니다. 없으면 None. """
+    value = attr.get('etime') or attr.get('mtime')
+    if hasattr(value, 'timestamp'):
+        return value.timestamp()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_path(path):
+    path = '/' + '/'.join(part for part in str(path).split('/') if part)
+    return path
+
+
+def join_path(parent_path, name):
+    return normalize_path(f"{parent_path}/{name}")
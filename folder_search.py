@@ -0,0 +1,167 @@
+import time
+import logging
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from folder_index import ROOT_ID
+
+# 폴더 검색/크롤러 블럭 ---------------------------------------------------------
+# 백그라운드 크롤러가 제한된 동시성으로 폴더 트리 전체를 폴더 인덱스에 채우고 (수정 시각이 바뀌지 않은 폴더는 다시 조회하지 않음),
+# 검색 인덱스는 폴더 이름의 정렬 목록(접두어, 이진 탐색)과 trigram 역색인(부분 문자열)으로
+# /folders/search 요청을 115 호출 없이 처리합니다.
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FolderSearchIndex:
+    """ FolderIndex의 현재 내용으로 만든 읽기 전용 검색 인덱스. 폴더 인덱스의 version이 바뀌면 다시 만듭니다.
+        크롤 중(hold)에는 version이 계속 바뀌므로 마지막으로 만든 인덱스를 그대로 쓰고, 크롤이 끝나면 한 번만 다시 만듭니다. """
+
+    def __init__(self, folder_index):
+        self.folder_index = folder_index
+        self.held = False
+        self._built_version = None
+        self._lock = threading.Lock()
+        self._folders = {}  # {id: (name, path)}
+        self._names = []  # [(소문자 이름, id)] 정렬됨
+        self._trigrams = {}  # {trigram: {id, ...}}
+
+    def hold(self):
+        self.held = True
+
+    def release(self):
+        """ hold 이후의 변경을 한 번에 반영해 다시 만듭니다. """
+        self.held = False
+        self._ensure_built()
+
+    def _ensure_built(self):
+        version = self.folder_index.version
+        if self._built_version == version or (self.held and self._built_version is not None):
+            return
+        with self._lock:
+            if self._built_version == version:
+                return
+            folders = {}
+            grams = {}
+            for folder_id, name, path in self.folder_index.nodes():
+                folders[folder_id] = (name, path)
+                for gram in trigrams(name.lower()):
+                    grams.setdefault(gram, set()).add(folder_id)
+            self._names = sorted((name.lower(), folder_id) for folder_id, (name, _) in folders.items())
+            self._folders, self._trigrams = folders, grams
+            self._built_version = version
+
+    def __len__(self):
+        self._ensure_built()
+        return len(self._folders)
+
+    def search(self, q, limit=20):
+        """ 이름이 q와 같은 폴더, q로 시작하는 폴더, q를 포함하는 폴더 순으로 최대 limit개를 반환합니다. """
+        self._ensure_built()
+        q = q.strip().lower()
+        if not q:
+            return []
+        names, folders = self._names, self._folders
+
+        prefix = []
+        for i in range(bisect_left(names, (q, '')), len(names)):
+            name, folder_id = names[i]
+            if not name.startswith(q):
+                break
+            prefix.append(folder_id)
+
+        if len(q) >= 3:  # trigram 교집합으로 후보를 좁힌 뒤 실제로 포함하는지 확인
+            candidates = None
+            for gram in sorted(trigrams(q), key=lambda gram: len(self._trigrams.get(gram, ()))):
+                ids = self._trigrams.get(gram, set())
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            candidates = candidates or set()
+        else:
+            candidates = folders.keys()
+        seen = set(prefix)
+        substring = [folder_id for folder_id in candidates if folder_id not in seen and q in folders[folder_id][0].lower()]
+
+        def rank(folder_id):
+            name, path = folders[folder_id]
+            return (name.lower() != q, len(name), path.count('/'), path)
+
+        ordered = sorted(prefix, key=rank) + sorted(substring, key=rank)
+        return [{'id': folder_id, 'name': folders[folder_id][0], 'path': folders[folder_id][1]} for folder_id in ordered[:limit]]
+
+
+class FolderCrawler:
+    """ 루트부터 폴더 트리 전체를 너비 우선으로 조회해 폴더 인덱스를 채웁니다.
+        list_children(folder_id)는 115에서 하위 폴더 목록을 조회해 인덱스에 반영하고 반환합니다.
+        부모 목록에서 본 수정 시각이 하위 목록을 조회했을 때와 같은 폴더는 조회하지 않고 저장된 하위 목록으로 내려갑니다.
+        (115가 깊은 하위 폴더의 변경을 상위 폴더의 수정 시각에 반영하지 않는 경우에 대비해 full_every번째 크롤마다 전체를 다시 조회) """
+
+    def __init__(self, list_children, save, index=None, search_index=None, interval=3600, concurrency=3, full_every=24):
+        self.list_children = list_children
+        self.save = save  # 크롤이 끝날 때 한 번 인덱스를 파일에 저장
+        self.index = index  # 수정 시각 비교용 FolderIndex (없으면 매번 전체 조회)
+        self.search_index = search_index  # 크롤 중에는 다시 만들지 않고, 끝날 때 한 번만 다시 만듦
+        self.interval = interval
+        self.concurrency = concurrency
+        self.full_every = full_every
+        self.state = {'running': False, 'started_at': None, 'finished_at': None, 'crawls': 0, 'full': False,
+                      'visited': 0, 'listed': 0, 'skipped': 0, 'errors': 0, 'duration': None}
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='folder-crawler', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                self.crawl()
+            except Exception as e:
+                logging.error(f"Folder crawl failed: {e}")
+            time.sleep(self.interval)
+
+    def _visit(self, folder_id, full):
+        """ (하위 폴더 목록, 115에서 조회했는지 여부) """
+        if not full and self.index is not None:
+            children = self.index.unchanged_children(folder_id)
+            if children is not None:
+                return children, False
+        return self.list_children(folder_id), True
+
+    def crawl(self):
+        started = time.monotonic()
+        crawls = self.state['crawls'] + 1
+        full = self.index is None or (self.full_every > 0 and crawls % self.full_every == 0)
+        self.state.update(running=True, started_at=time.time(), crawls=crawls, full=full, visited=0, listed=0, skipped=0, errors=0)
+        if self.search_index is not None:
+            self.search_index.hold()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.concurrency), thread_name_prefix='folder-crawl') as executor:
+                pending = {executor.submit(self._visit, ROOT_ID, full): ROOT_ID}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        folder_id = pending.pop(future)
+                        self.state['visited'] += 1
+                        try:
+                            children, listed = future.result()
+                        except Exception as e:
+                            self.state['errors'] += 1
+                            logging.warning(f"Folder crawl could not list {folder_id}: {e}")
+                            continue
+                        self.state['listed' if listed else 'skipped'] += 1
+                        for child in children:
+                            pending[executor.submit(self._visit, child['id'], full)] = child['id']
+            self.save()
+        finally:
+            if self.search_index is not None:
+                self.search_index.release()
+            self.state.update(running=False, finished_at=time.time(), duration=round(time.monotonic() - started, 3))
+        logging.info(f"Folder crawl finished: {self.state['visited']} folders ({self.state['listed']} listed, {self.state['skipped']} unchanged) "
+                     f"in {self.state['duration']}s ({self.state['errors']} errors, full={full})")
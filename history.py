@@ -0,0 +1,156 @@
+import os
+import gzip
+import math
+import json
+import logging
+import threading
+from datetime import datetime
+
+# 작업 기록 보관소 블럭 ---------------------------------------------------------
+# 삭제되었거나 115 목록에서 사라진 작업의 기록을 압축된 JSONL 파일(history.jsonl.gz)에 추가 전용으로 보관합니다.
+# 추가할 때마다 gzip 멤버 하나를 파일 끝에 덧붙이고, compact_every번 추가하면 같은 기록((info_hash, removed_time))만
+# 제거해 하나의 멤버로 다시 압축합니다. (같은 작업을 다시 추가했다가 삭제한 기록은 별개의 기록으로 유지) 통계(/stats)는 메모리에 읽어 둔 기록으로 계산하고 결과를 캐시합니다.
+
+
+def percentile(values, fraction):
+    """ 정렬된 values의 백분위수 (nearest-rank). """
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class HistoryArchive:
+    def __init__(self, file_path, compact_every=50):
+        self.file_path = file_path
+        self.compact_every = compact_every
+        self.version = 0  # 기록이 추가/정리될 때마다 증가 (통계 캐시 키)
+        self._records = None  # 처음 사용할 때 파일에서 로드
+        self._appends = 0  # 마지막 정리 이후 덧붙인 멤버 수
+        self._stats_cache = {}
+        self._lock = threading.RLock()
+
+    # 로드/저장 -------------------------------------------------------------
+    def _ensure_loaded(self):
+        if self._records is not None:
+            return
+        self._records = []
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with gzip.open(self.file_path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._records.append(json.loads(line))
+                    except ValueError:
+                        continue  # 쓰기 도중 중단된 줄은 건너뜀 (다음 정리 때 제거됨)
+        except (OSError, EOFError) as e:
+            logging.error(f"Error reading history archive {self.file_path}: {e}")
+        logging.info(f"History archive loaded ({len(self._records)} records).")
+
+    def append(self, records):
+        """ 기록 목록을 gzip 멤버 하나로 파일 끝에 덧붙입니다. """
+        records = list(records)
+        if not records:
+            return
+        data = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in records)
+        with self._lock:
+            self._ensure_loaded()
+            with open(self.file_path, 'ab') as f:
+                f.write(gzip.compress(data.encode('utf-8')))
+            self._records.extend(records)
+            self._appends += 1
+            self.version += 1
+            if self._appends >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """ 같은 (info_hash, removed_time) 기록은 하나만 남겨 하나의 gzip 멤버로 다시 씁니다. (임시 파일에 쓴 뒤 교체) """
+        with self._lock:
+            self._ensure_loaded()
+            unique = {}
+            for record in self._records:
+                unique.setdefault((record.get('info_hash'), record.get('removed_time')), record)
+            records = list(unique.values())
+            tmp_path = f"{self.file_path}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            os.replace(tmp_path, self.file_path)
+            removed = len(self._records) - len(records)
+            self._records = records
+            self._appends = 0
+            self.version += 1
+        logging.info(f"History archive compacted ({len(records)} records, {removed} duplicates removed).")
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._records)
+
+    # 통계 ------------------------------------------------------------------
+    def stats(self, since=None, until=None):
+        """ 완료 시각이 [since, until] 범위인 기록의 통계. since/until은 'YYYY-MM-DD' 문자열. """
+        key = (self.version, since, until)
+        cached = self._stats_cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            self._ensure_loaded()
+            records = list(self._records)
+
+        latencies = []
+        per_folder = {}  # {folder: {'count', 'bytes', 'latencies'}}
+        bytes_per_day = {}
+        incomplete = 0
+        for record in records:
+            created, completed = _parse_time(record.get('created_time')), _parse_time(record.get('completed_time'))
+            if completed is None:
+                incomplete += 1  # 완료되지 않고 삭제된 작업
+                continue
+            day = completed.strftime('%Y-%m-%d')
+            if (since and day < since) or (until and day > until):
+                continue
+            size = record.get('size') or 0
+            folder = per_folder.setdefault(record.get('folder_name') or record.get('folder_id') or 'N/A',
+                                           {'count': 0, 'bytes': 0, 'latencies': []})
+            folder['count'] += 1
+            folder['bytes'] += size
+            bytes_per_day[day] = bytes_per_day.get(day, 0) + size
+            if created is not None and completed >= created:
+                latency = (completed - created).total_seconds()
+                latencies.append(latency)
+                folder['latencies'].append(latency)
+
+        latencies.sort()
+        folders = {}
+        for name, folder in per_folder.items():
+            values = sorted(folder['latencies'])
+            folders[name] = {
+                'count': folder['count'], 'bytes': folder['bytes'],
+                'avg_seconds': round(sum(values) / len(values), 1) if values else None,
+                'p50_seconds': percentile(values, 0.5), 'p90_seconds': percentile(values, 0.9),
+            }
+
+        result = {
+            'archived': len(records),
+            'completed': sum(folder['count'] for folder in per_folder.values()),
+            'removed_incomplete': incomplete,
+            'latency_seconds': {
+                'p50': percentile(latencies, 0.5), 'p90': percentile(latencies, 0.9),
+                'p99': percentile(latencies, 0.99), 'max': latencies[-1] if latencies else None,
+            },
+            'bytes_per_day': dict(sorted(bytes_per_day.items())),
+            'folders': folders,
+        }
+        if any(cached_key[0] != self.version for cached_key in self._stats_cache):
+            self._stats_cache = {}  # 이전 버전의 결과는 버림
+        self._stats_cache[key] = result
+        return result
@@ -0,0 +1,69 @@
+import gzip
+import json
+import hashlib
+import threading
+
+try:
+    import brotli  # 선택 사항: 설치되어 있으면 br 인코딩도 지원
+except ImportError:
+    brotli = None
+
+# 조건부 요청/압축 블럭 ---------------------------------------------------------
+# 응답 본문이 바뀌는 시점(스냅샷/폴더 인덱스의 version)으로 강한 ETag를 만들어 If-None-Match가 같으면 304를 돌려주고,
+# 클라이언트가 허용하면 본문을 gzip(또는 brotli)으로 압축합니다. 압축된 본문은 ETag별로 캐시해
+# 같은 스냅샷을 여러 클라이언트가 받아도 한 번만 압축합니다.
+
+MIN_COMPRESS_SIZE = 1024  # 이보다 작은 본문은 압축하지 않음
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript', 'text/javascript')
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encodings):
+    """ 요청의 Accept-Encoding(werkzeug Accept 객체)에서 사용할 인코딩을 고릅니다. 없으면 None. """
+    return accept_encodings.best_match(supported_encodings())
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def query_hash(args):
+    """ 쿼리 인자(순서 무관)를 ETag에 넣을 짧은 해시로 만듭니다. """
+    items = sorted((key, value) for key in args for value in args.getlist(key)) if hasattr(args, 'getlist') else sorted(args.items())
+    if not items:
+        return ''
+    return hashlib.sha1(json.dumps(items, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+
+def make_etag(*parts):
+    """ 비어 있지 않은 부분들을 '-'로 이어 ETag 값(따옴표 없음)을 만듭니다. """
+    return '-'.join(str(part) for part in parts if part not in (None, ''))
+
+
+class EncodedBodyCache:
+    """ {(etag, encoding): 본문 bytes}를 최근 max_entries개만 보관합니다. """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        body = self._entries.get(key)
+        if body is not None:
+            return body, True
+        body = build()
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))  # 가장 먼저 넣은 항목부터 제거
+        return body, False
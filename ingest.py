@@ -0,0 +1,103 @@
+import re
+import base64
+import logging
+from urllib.parse import unquote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 대량 링크 추가 블럭 -----------------------------------------------------------
+# 붙여넣은 링크들을 정규화하고 info_hash 기준으로 중복을 제거한 뒤,
+# 115의 한 번 호출 최대 개수(url[i])만큼 묶어 제한된 동시성으로 전송합니다.
+
+BTIH_PATTERN = re.compile(r'xt=urn:btih:([0-9a-zA-Z]+)', re.IGNORECASE)
+LINK_SEPARATOR = re.compile(r'[\r\n,]+')
+
+
+def extract_info_hash(link):
+    """ magnet 링크에서 info_hash(소문자 40자리 hex)를 추출합니다. base32 형식도 hex로 변환. 없으면 None. """
+    match = BTIH_PATTERN.search(unquote(link))
+    if not match:
+        return None
+    value = match.group(1)
+    if len(value) == 40 and re.fullmatch(r'[0-9a-fA-F]+', value):
+        return value.lower()
+    if len(value) == 32:
+        try:
+            return base64.b32decode(value.upper()).hex()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_links(links):
+    """ 문자열(줄바꿈/쉼표 구분) 또는 리스트를 받아 공백을 제거한 링크 목록으로 만듭니다.
+        문자열이 아닌 항목이 있으면 ValueError. """
+    if isinstance(links, str):
+        links = LINK_SEPARATOR.split(links)
+    elif not isinstance(links, list) or not all(isinstance(link, str) for link in links):
+        raise ValueError('links must be a string or a list of strings')
+    return [link.strip() for link in links if link and link.strip()]
+
+
+def plan_ingest(links, known_hashes):
+    """ 전송할 (link, info_hash) 목록과 건너뛴 링크들의 결과 목록을 반환합니다.
+        - 같은 요청 안의 중복은 duplicate, 이미 알고 있는 작업은 existing으로 처리합니다.
+        - info_hash가 없는 링크(ed2k, http 등)는 링크 문자열 자체로 중복을 판단합니다. """
+    to_submit = []
+    skipped = []
+    seen = set()
+    for link in links:
+        info_hash = extract_info_hash(link)
+        if link.lower().startswith('magnet:') and info_hash is None:
+            skipped.append({'link': link, 'info_hash': None, 'status': 'invalid', 'error': 'No valid btih in magnet link'})
+            continue
+        key = info_hash or link
+        if key in seen:
+            skipped.append({'link': link, 'info_hash': info_hash, 'status': 'duplicate'})
+        elif info_hash and info_hash in known_hashes:
+            skipped.append({'link': link, 'info_hash': info_hash, 'status': 'existing'})
+        else:
+            to_submit.append((link, info_hash))
+        seen.add(key)
+    return to_submit, skipped
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _chunk_results(chunk, result):
+    """ add_task_urls 응답을 링크별 결과로 변환합니다. 응답 result 배열은 요청한 url 순서를 따릅니다. """
+    if not result.get('state'):
+        error = result.get('error_msg', 'Unknown error')
+        return [{'link': link, 'info_hash': info_hash, 'status': 'failed', 'error': error, 'errno': result.get('errno')}
+                for link, info_hash in chunk]
+
+    items = result.get('result', [])
+    outcomes = []
+    for i, (link, info_hash) in enumerate(chunk):
+        item = items[i] if i < len(items) else {}
+        outcome = {'link': link, 'info_hash': item.get('info_hash') or info_hash, 'name': item.get('name'),
+                   'size': item.get('size', 0)}
+        if item.get('state'):
+            outcome['status'] = 'added'
+        elif item.get('errcode') == 10008:  # 115: 이미 존재하는 작업
+            outcome['status'] = 'existing'
+        else:
+            outcome.update(status='failed', error=item.get('error_msg', 'Unknown error'), errno=item.get('errno'))
+        outcomes.append(outcome)
+    return outcomes
+
+
+def submit_in_chunks(add_urls, entries, chunk_size, concurrency):
+    """ entries를 chunk_size개씩 묶어 add_urls(urls)를 최대 concurrency개 동시에 호출하고,
+        묶음이 끝날 때마다 해당 링크들의 결과 목록을 yield 합니다. """
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='bulk-add') as executor:
+        futures = {executor.submit(add_urls, [link for link, _ in chunk]): chunk for chunk in chunked(entries, chunk_size)}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                yield _chunk_results(chunk, future.result())
+            except Exception as e:
+                logging.error(f"Error submitting {len(chunk)} links: {e}")
+                yield [{'link': link, 'info_hash': info_hash, 'status': 'failed', 'error': str(e)} for link, info_hash in chunk]
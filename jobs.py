@@ -0,0 +1,207 @@
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+
+# 작업 큐 블럭 ------------------------------------------------------------------
+# 느린 115 호출(작업 추가/삭제/완료 작업 정리)을 요청 처리와 분리하는 프로세스 내 작업 큐.
+# 작업(job)은 SQLite에 저장되므로 컨테이너가 재시작되어도 대기 중이던 작업이 이어서 실행됩니다.
+# 115가 captcha/호출 제한(errno 911 등)으로 거부하면 큐 전체를 잠시 멈추고(backpressure) 나중에 다시 시도합니다.
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class ThrottledError(Exception):
+    """ 115가 captcha 또는 호출 제한으로 요청을 거부한 경우. 작업은 대기열로 돌아가 나중에 재시도됩니다. """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobContext:
+    """ 작업 처리 함수가 진행 상황과 항목별 결과를 보고할 때 사용합니다. """
+
+    def __init__(self, queue, job):
+        self._queue = queue
+        self.job = job
+
+    def report(self, items=(), **progress):
+        self.job['items'].extend(items)
+        self.job['progress'].update(progress)
+        self._queue._save(self.job)
+
+
+class JobQueue:
+    def __init__(self, db_path, workers=2, throttle_backoff=300, max_attempts=5, on_update=None, retention=86400, prune_interval=3600):
+        self.workers = workers
+        self.throttle_backoff = throttle_backoff
+        self.max_attempts = max_attempts
+        self.retention = retention  # 완료/실패한 작업을 보관하는 시간(초)
+        self.prune_interval = prune_interval  # 오래된 완료 작업을 정리하는 최소 간격(초)
+        self._last_prune = 0
+        self.on_update = on_update  # on_update(job_dict): 상태가 바뀔 때마다 호출 (SSE 전송 등)
+        self.paused_until = 0  # 이 시각까지 새 작업을 꺼내지 않음 (backpressure)
+        self._handlers = {}
+        self._lock = threading.RLock()
+        self._wake = threading.Condition(self._lock)
+        self._threads = []
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT NOT NULL DEFAULT '{}',
+                items TEXT NOT NULL DEFAULT '[]',
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                not_before REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+
+    def register(self, kind, handler):
+        """ handler(payload, context) -> 결과 dict(진행 상황에 병합됨). """
+        self._handlers[kind] = handler
+
+    def start(self):
+        with self._lock:
+            # 재시작 전에 실행 중이던 작업은 다시 대기열로, 오래된 완료 작업은 정리
+            self._conn.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?', (QUEUED, time.time(), RUNNING))
+            self._prune()
+            resumed = self.depth
+        if resumed:
+            logging.info(f"Resuming {resumed} queued jobs")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _prune(self):
+        """ retention보다 오래된 완료/실패 작업을 삭제합니다. (self._lock을 잡은 상태에서 호출) """
+        now = time.time()
+        self._last_prune = now
+        deleted = self._conn.execute('DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+                                     (DONE, FAILED, now - self.retention)).rowcount
+        if deleted:
+            logging.info(f"Pruned {deleted} finished jobs older than {self.retention}s")
+
+    # 조회/등록 -------------------------------------------------------------
+    def submit(self, kind, payload):
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        job = {'id': uuid.uuid4().hex, 'kind': kind, 'status': QUEUED, 'progress': {}, 'items': [],
+               'error': None, 'attempts': 0, 'created_at': now, 'updated_at': now}
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job['id'], kind, json.dumps(payload), QUEUED, now, now)
+            )
+            self._wake.notify()
+        self._notify(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    @property
+    def depth(self):
+        """ 대기 중인 작업 수. """
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', (QUEUED,)).fetchone()[0]
+
+    @staticmethod
+    def _row_to_job(row):
+        return {
+            'id': row['id'], 'kind': row['kind'], 'status': row['status'],
+            'progress': json.loads(row['progress']), 'items': json.loads(row['items']),
+            'error': row['error'], 'attempts': row['attempts'],
+            'created_at': row['created_at'], 'updated_at': row['updated_at'],
+        }
+
+    # 실행 ------------------------------------------------------------------
+    def _claim(self):
+        """ 실행할 다음 작업을 RUNNING으로 바꾸어 반환합니다. 없으면 (None, 대기 시간). """
+        now = time.time()
+        if self.paused_until > now:
+            return None, self.paused_until - now
+        row = self._conn.execute(
+            'SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1', (QUEUED,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        if row['not_before'] > now:
+            return None, row['not_before'] - now
+        self._conn.execute('UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?',
+                           (RUNNING, now, row['id']))
+        job = self._row_to_job(row)
+        job.update(status=RUNNING, attempts=row['attempts'] + 1, updated_at=now)
+        return (job, json.loads(row['payload'])), None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                claimed, wait = self._claim()
+                if claimed is None:
+                    self._wake.wait(wait)
+                    continue
+            job, payload = claimed
+            self._notify(job)
+            self._execute(job, payload)
+
+    def _execute(self, job, payload):
+        if job['attempts'] > 1:
+            job['items'] = []  # 재시도하면 이번 시도의 결과만 보관
+        try:
+            result = self._handlers[job['kind']](payload, JobContext(self, job))
+            job['progress'].update(result or {})
+            job.update(status=DONE, error=None)
+        except ThrottledError as e:
+            retry_after = e.retry_after or self.throttle_backoff
+            if job['attempts'] >= self.max_attempts:
+                job.update(status=FAILED, error=str(e))
+            else:
+                # 큐 전체를 잠시 멈추고 이 작업은 대기열로 되돌림
+                job.update(status=QUEUED, error=f"Throttled by 115, retrying in {retry_after}s: {e}")
+                with self._lock:
+                    self.paused_until = time.time() + retry_after
+                    self._conn.execute('UPDATE jobs SET not_before = ? WHERE id = ?', (self.paused_until, job['id']))
+                logging.warning(f"Job {job['id']} throttled by 115, pausing queue for {retry_after}s: {e}")
+        except Exception as e:
+            logging.error(f"Job {job['id']} ({job['kind']}) failed: {e}")
+            job.update(status=FAILED, error=str(e))
+        self._save(job)
+
+    def _save(self, job):
+        job['updated_at'] = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, progress = ?, items = ?, error = ?, updated_at = ? WHERE id = ?',
+                (job['status'], json.dumps(job['progress'], ensure_ascii=False), json.dumps(job['items'], ensure_ascii=False),
+                 job['error'], job['updated_at'], job['id'])
+            )
+            if job['status'] == QUEUED:
+                self._wake.notify()
+            elif job['status'] in (DONE, FAILED) and job['updated_at'] - self._last_prune >= self.prune_interval:
+                self._prune()  # 오래 실행되는 컨테이너에서도 완료 작업이 계속 쌓이지 않도록 주기적으로 정리
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                logging.error(f"Error publishing job update: {e}")
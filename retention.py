@@ -0,0 +1,173 @@
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+
+# 보관 정책 블럭 ----------------------------------------------------------------
+# cron으로 /tasks/clear_completed를 주기 호출하는 대신, 선언한 보관 정책을 캐시된 작업 스냅샷에 적용하여
+# 삭제할 작업이 있을 때만 삭제 작업(job)을 등록합니다. 정책 평가에는 115 호출이 없습니다.
+#
+# 정책 예 (RETENTION_POLICIES, JSON 배열):
+#   {"type": "completed_older_than", "hours": 24}              완료 후 24시간이 지난 작업 삭제
+#   {"type": "keep_last_per_folder", "count": 50}              폴더별로 최근 완료 50개만 남기고 삭제
+#   {"type": "delete_failed"}                                  실패한 작업 삭제
+#   공통 옵션: "folder_id"(해당 저장 폴더에만 적용), "delete_folders"(다운로드 폴더도 함께 삭제)
+
+POLICY_TYPES = ('completed_older_than', 'keep_last_per_folder', 'delete_failed')
+STATUS_COMPLETE = 2  # 115 오프라인 작업 상태: 완료
+STATUS_FAILED = -1  # 115 오프라인 작업 상태: 실패
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class InvalidPolicy(ValueError):
+    """ 알 수 없는 정책 종류이거나 필요한 값이 없는 경우. """
+
+
+def parse_policies(raw):
+    """ JSON 문자열 또는 리스트를 검증된 정책 목록으로 변환합니다. """
+    if not raw:
+        return []
+    policies = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(policies, list):
+        raise InvalidPolicy('Retention policies must be a JSON array')
+
+    parsed = []
+    for policy in policies:
+        kind = policy.get('type')
+        if kind not in POLICY_TYPES:
+            raise InvalidPolicy(f"Unknown retention policy type: {kind}")
+        normalized = {'type': kind, 'folder_id': str(policy['folder_id']) if policy.get('folder_id') else None,
+                      'delete_folders': bool(policy.get('delete_folders', False))}
+        try:
+            if kind == 'completed_older_than':
+                normalized['hours'] = float(policy['hours'])
+            elif kind == 'keep_last_per_folder':
+                normalized['count'] = int(policy['count'])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidPolicy(f"Invalid value for retention policy {kind}: {policy}")
+        parsed.append(normalized)
+    return parsed
+
+
+def _timestamp(value):
+    return datetime.strptime(value, TIME_FORMAT).timestamp() if value else None
+
+
+def match_policy(policy, snapshot, now):
+    """ 정책에 해당하는 task_id 목록을 반환합니다. """
+    rows = {task['task_id']: task for task in snapshot.tasks}
+    candidates = [
+        (task_id, task) for task_id, task in snapshot.upstream.items()
+        if task_id in rows and (policy['folder_id'] is None or str(task.get('wp_path_id')) == policy['folder_id'])
+    ]
+
+    def finished_at(task_id):  # 완료 시간이 없으면 생성 시간 기준
+        row = rows[task_id]
+        return _timestamp(row['completed_time']) or _timestamp(row['created_time']) or 0
+
+    if policy['type'] == 'delete_failed':
+        return [task_id for task_id, task in candidates if task.get('status') == STATUS_FAILED]
+
+    completed = [task_id for task_id, task in candidates if task.get('status') == STATUS_COMPLETE]
+    if policy['type'] == 'completed_older_than':
+        cutoff = now - policy['hours'] * 3600
+        return [task_id for task_id in completed if finished_at(task_id) <= cutoff]
+
+    by_folder = {}  # keep_last_per_folder
+    for task_id in completed:
+        by_folder.setdefault(str(snapshot.upstream[task_id].get('wp_path_id')), []).append(task_id)
+    matched = []
+    for task_ids in by_folder.values():
+        task_ids.sort(key=finished_at, reverse=True)
+        matched.extend(task_ids[policy['count']:])
+    return matched
+
+
+def evaluate(policies, snapshot, now=None):
+    """ 모든 정책을 적용해 {delete_folders: [task_id, ...]}를 반환합니다.
+        여러 정책에 해당하는 작업은 먼저 선언된 정책의 delete_folders를 따릅니다. """
+    now = now or time.time()
+    assigned = {}
+    for policy in policies:
+        for task_id in match_policy(policy, snapshot, now):
+            assigned.setdefault(task_id, policy['delete_folders'])
+    groups = {}
+    for task_id, delete_folders in assigned.items():
+        groups.setdefault(delete_folders, []).append(task_id)
+    return groups
+
+
+class RetentionScheduler:
+    """ 새 스냅샷이 발행되거나 interval초가 지날 때마다 정책을 평가하고, 해당 작업이 있을 때만 삭제를 요청합니다.
+        get_snapshot()은 평가할 스냅샷(아직 115에서 조회하지 못했으면 None),
+        submit(task_ids, delete_folders)는 삭제 작업을 등록하고 job_id를 반환,
+        is_busy(job_id)는 이전에 등록한 작업이 아직 끝나지 않았는지 반환합니다. """
+
+    def __init__(self, policies, get_snapshot, submit, is_busy, interval=300):
+        self.policies = policies
+        self.get_snapshot = get_snapshot
+        self.submit = submit
+        self.is_busy = is_busy
+        self.interval = interval
+        self.state = {'last_run': None, 'last_matched': 0, 'last_job_ids': [], 'runs': 0, 'submitted': 0}
+        self._submitted = {}  # {task_id: 삭제를 요청했을 때의 스냅샷 updated_at}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.policies:
+            self._wake.set()  # 이미 발행된 스냅샷이 있으면 바로 평가
+            self._thread = threading.Thread(target=self._run, name='retention', daemon=True)
+            self._thread.start()
+        return self
+
+    def on_snapshot(self, old, new):
+        """ TaskPoller 리스너: 새 스냅샷이 발행되면 바로 평가합니다. """
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Error applying retention policies: {e}")
+
+    def preview(self):
+        """ 지금 평가하면 삭제될 작업 목록 (삭제는 하지 않음). """
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return {}
+        return evaluate(self.policies, snapshot)
+
+    def run_once(self):
+        with self._lock:
+            snapshot = self.get_snapshot()
+            if snapshot is None or any(self.is_busy(job_id) for job_id in self.state['last_job_ids']):
+                return []  # 이전 삭제가 끝나기 전에는 같은 작업을 다시 요청하지 않음
+
+            # 삭제를 요청한 뒤 115를 다시 조회하기 전에는 같은 작업을 다시 요청하지 않음
+            # (바뀐 작업이 없으면 스냅샷 version이 그대로이므로, 조회할 때마다 바뀌는 updated_at을 기준으로 함.
+            #  삭제가 실패해 작업이 남아 있으면 다음 조회 후 다시 요청)
+            self._submitted = {task_id: polled for task_id, polled in self._submitted.items() if task_id in snapshot.upstream}
+            groups = {
+                delete_folders: [task_id for task_id in task_ids if self._submitted.get(task_id, -1) < snapshot.updated_at]
+                for delete_folders, task_ids in evaluate(self.policies, snapshot).items()
+            }
+
+            job_ids = []
+            for delete_folders, task_ids in groups.items():
+                if not task_ids:
+                    continue
+                job_ids.append(self.submit(task_ids, delete_folders))
+                self._submitted.update((task_id, snapshot.updated_at) for task_id in task_ids)
+            matched = sum(len(task_ids) for task_ids in groups.values())
+            self.state.update(last_run=time.time(), last_matched=matched, runs=self.state['runs'] + 1)
+            if job_ids:
+                self.state['last_job_ids'] = job_ids
+                self.state['submitted'] += matched
+                logging.info(f"Retention policies matched {matched} tasks, queued jobs {job_ids}")
+            return job_ids
@@ -7,27 +7,34 @@ function toggleFolderList() {
     folderListContainer.style.display = folderListContainer.style.display === 'none' ? 'block' : 'none';
 
     if (folderListContainer.style.display === 'block') {
-        fetchFolders(currentPath);  // 현재 선택된 경로에서 폴더 목록을 로드
+        fetchFolders(selectedFolderTarget(currentPath));  // 현재 선택된 경로에서 폴더 목록을 로드
     }
 }
 
-// 폴더 목록을 가져와서 표시
-async function fetchFolders(targetFolderName) {
+// 클라이언트가 보고 있는 폴더 위치. 서버는 위치를 저장하지 않으므로 요청마다 folder_id(또는 path)를 보냄
+let currentFolder = { id: '0', path: '/' };
+
+// 선택된 폴더 ID가 있으면 ID로, 없으면 표시된 경로로 폴더를 지정
+function selectedFolderTarget(currentPath) {
+    const selectedFolderId = document.getElementById('selectedPath').value;
+    return selectedFolderId ? { folder_id: selectedFolderId } : { path: currentPath || '/' };
+}
+
+// 폴더 목록을 가져와서 표시 (target: { folder_id } 또는 { path })
+async function fetchFolders(target) {
     const folderLoadingIcon = document.getElementById('folderLoadingIcon');
     folderLoadingIcon.style.display = 'inline-block'; // 로딩 아이콘 표시
 
     try {
-        const response = await fetch('/folders', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ folder_name: targetFolderName })
-        });
+        // GET 요청은 ETag로 재검증되므로 바뀌지 않은 폴더는 본문 없이(304) 브라우저 캐시에서 표시됨
+        const response = await fetch(`/folders?${new URLSearchParams(target)}`);
 
         if (!response.ok) {
             throw new Error('Failed to load subfolders');
         }
 
         const data = await response.json();
+        currentFolder = { id: data.current_folder_id, path: data.current_path };
         const folderListElement = document.getElementById('folderList');
         folderListElement.innerHTML = '';
 
@@ -36,16 +43,10 @@ async function fetchFolders(targetFolderName) {
             parentElement.innerHTML = `<i class="bi bi-folder"></i> ..`;
             parentElement.classList.add('folder-item');
             parentElement.onclick = async () => {
-                await fetchFolders('..');
-
-                // 현재 경로에서 마지막 폴더를 제거한 후, 루트 처리
-                let newPath = data.current_path.split('/').slice(0, -1).join('/');
-                if (newPath === '') {
-                    newPath = '/';
-                }
+                await fetchFolders({ folder_id: data.parent_folder_id });
 
-                document.getElementById('selectedPathDisplay').value = newPath;
-                document.getElementById('selectedPath').value = data.parent_folder_id;
+                document.getElementById('selectedPathDisplay').value = currentFolder.path;
+                document.getElementById('selectedPath').value = currentFolder.id;
             };
             folderListElement.appendChild(parentElement);
         } else {
@@ -59,7 +60,7 @@ async function fetchFolders(targetFolderName) {
             folderElement.classList.add('folder-item');
 
             folderElement.onclick = async () => {
-                await fetchFolders(folder.name);
+                await fetchFolders({ folder_id: folder.id });
                 selectFolder(folder.id, folder.name, data.current_path);
             };
 
@@ -73,6 +74,61 @@ async function fetchFolders(targetFolderName) {
     }
 }
 
+// 폴더 검색: 입력이 멈추면 /folders/search로 이름을 검색하고, 결과를 누르면 그 폴더로 바로 이동
+let folderSearchTimer = null;
+let folderSearchSeq = 0; // 늦게 도착한 이전 검색 결과는 무시
+
+function onFolderSearchInput() {
+    clearTimeout(folderSearchTimer);
+    folderSearchTimer = setTimeout(() => searchFolders(document.getElementById('folderSearch').value), 200);
+}
+
+async function searchFolders(query) {
+    const resultsElement = document.getElementById('folderSearchResults');
+    const seq = ++folderSearchSeq;
+    if (!query.trim()) {
+        resultsElement.style.display = 'none';
+        resultsElement.innerHTML = '';
+        return;
+    }
+
+    try {
+        const response = await fetch(`/folders/search?q=${encodeURIComponent(query)}&limit=20`);
+        if (!response.ok) {
+            throw new Error('Failed to search folders');
+        }
+        const data = await response.json();
+        if (seq !== folderSearchSeq) {
+            return;
+        }
+
+        resultsElement.innerHTML = '';
+        data.folders.forEach(folder => {
+            const resultElement = document.createElement('div');
+            resultElement.classList.add('folder-item');
+            resultElement.innerHTML = `<i class="bi bi-search"></i> `;
+            resultElement.appendChild(document.createTextNode(folder.path));
+            resultElement.onclick = () => jumpToFolder(folder);
+            resultsElement.appendChild(resultElement);
+        });
+        if (!data.folders.length) {
+            resultsElement.innerHTML = `<div class="folder-item text-muted">No matching folders${data.crawling ? ' (indexing...)' : ''}</div>`;
+        }
+        resultsElement.style.display = 'block';
+    } catch (error) {
+        console.error('Error searching folders:', error);
+    }
+}
+
+// 검색 결과의 폴더로 이동하고 저장 폴더로 선택
+async function jumpToFolder(folder) {
+    document.getElementById('folderSearch').value = '';
+    searchFolders('');
+    await fetchFolders({ folder_id: folder.id });
+    document.getElementById('selectedPath').value = currentFolder.id;
+    document.getElementById('selectedPathDisplay').value = currentFolder.path;
+}
+
 // 폴더 선택 처리: 선택된 폴더 ID와 경로를 selectedPath와 selectedPathDisplay 요소에 업데이트.
 function selectFolder(folderId, folderName, currentPath) {
     const selectedPathElement = document.getElementById('selectedPath');
@@ -104,10 +160,10 @@ function selectFolder(folderId, folderName, currentPath) {
 // 페이지 로드 후 초기 설정
 document.addEventListener('DOMContentLoaded', async function() {
     const selectedPathDisplayElement = document.getElementById('selectedPathDisplay');
-    await fetchFolders(selectedPathDisplayElement.value); // 페이지 로드 시 기본 폴더의 내용을 로드
-    await fetchTasks(); // 작업 목록을 가져옴
-
-    setInterval(fetchTasks, 600000); // 주기적으로 작업 목록을 갱신
+    initTaskTable();
+    await fetchFolders(selectedFolderTarget(selectedPathDisplayElement.value)); // 페이지 로드 시 기본 폴더의 내용을 로드
+    startTaskStream(); // 작업 목록을 받아오고 이후 변경분을 실시간으로 반영
+    document.getElementById('folderSearch').addEventListener('input', onFolderSearchInput);
 
     // 작업추가 (addTaskForm.onsubmit)
     document.getElementById('addTaskForm').onsubmit = async function (e) {
@@ -124,39 +180,45 @@ document.addEventListener('DOMContentLoaded', async function() {
             return;  // 여기서 반환하여 작업이 중단되도록 합니다.
         }
 
-        const urls = document.getElementById('urls').value.split('\n'); // 엔터로 구분된 URL들
+        const urls = document.getElementById('urls').value; // 엔터 또는 쉼표로 구분된 URL들 (서버에서 분리/중복 제거)
         const wp_path_id = document.getElementById('selectedPath').value;
 
-        if (!urls || !wp_path_id) {
+        if (!urls.trim() || !wp_path_id) {
             alert("URL과 폴더 ID를 확인하세요.");
             loadingIcon.style.display = 'none';
             return;
         }
-    
-        for (const url of urls) {
-            const response = await fetch('/tasks/add', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ urls: url, wp_path_id: wp_path_id }) // 폴더 ID와 함께 전송
-            });
-    
-            const result = await response.json();
-    
-            if (result.errno === 911) {
-                alert("공식 웹으로 1회 오프라인 다운로드를 시도하여 Captcha를 해지하세요.");
-                loadingIcon.style.display = 'none';
-                return;
-            }
-    
-            if (!response.ok) {
-                alert(`Failed to add task. Server responded with status: ${response.status}`);
-                loadingIcon.style.display = 'none';
-                return;
-            }
+
+        // 한 번의 요청으로 모든 링크를 작업 큐에 등록하고, 작업 진행 상황을 표시
+        const response = await fetch('/tasks/add_bulk', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ links: urls, wp_path_id: wp_path_id }) // 폴더 ID와 함께 전송
+        });
+
+        if (!response.ok) {
+            alert(`Failed to add task. Server responded with status: ${response.status}`);
+            loadingIcon.style.display = 'none';
+            return;
+        }
+
+        const { job_id } = await response.json();
+        const progressElement = document.getElementById('addProgress');
+        const job = await waitForJob(job_id, job => {
+            progressElement.textContent = formatBulkAddProgress(job);
+        });
+
+        const failed = job.items.filter(item => item.status === 'failed' || item.status === 'invalid');
+        if (job.status === 'queued' || failed.some(item => item.errno === 911)) {
+            alert("공식 웹으로 1회 오프라인 다운로드를 시도하여 Captcha를 해지하세요.");
+        } else if (job.status === 'failed') {
+            alert(`Failed to add tasks: ${job.error}`);
+        } else if (failed.length > 0) {
+            alert(`${failed.length} link(s) failed to add. See the progress message for details.`);
         }
     
         document.getElementById('urls').value = '';
-        await fetchTasks();
+        await syncTasksAfterJob(job);
         loadingIcon.style.display = 'none'; // 로딩 아이콘 숨기기
     
         // 폴더 목록을 닫고 기본 폴더로 리셋
@@ -164,103 +226,104 @@ document.addEventListener('DOMContentLoaded', async function() {
     };
 });
 
-// 폴더 선택 확인: 
-//  - /get_folder_id 경로로 GET 요청을 보내 현재 폴더의 ID를 가져옴.
-//  - 가져온 폴더 ID를 selectedPath에, 폴더 경로를 selectedPathDisplay에 업데이트.
-async function confirmSelection() {
-    const loadingIcon = document.getElementById('loadingIcon');
-    loadingIcon.style.display = 'inline-block'; // 로딩 아이콘 표시
-
-    try {
-        const response = await fetch('/get_folder_id', {
-            method: 'GET',
-            headers: { 'Content-Type': 'application/json' }
-        });
+// 작업 큐에 등록된 작업이 끝날 때까지 /jobs/<id>를 주기적으로 조회 (onProgress로 중간 상태 전달)
+// 115가 captcha/호출 제한으로 거부해 작업이 대기열로 돌아간 경우에도 기다리지 않고 반환
+async function waitForJob(jobId, onProgress = () => {}, interval = 1000) {
+    while (true) {
+        const response = await fetch(`/jobs/${jobId}`);
+        const job = await response.json();
+        onProgress(job);
 
-        const data = await response.json();
-        if (data.folder_id) {
-            // 루트 폴더가 선택되었는지 확인
-            if (data.folder_id === "0") {
-                alert("Root folder cannot be selected.");
-                return; // 선택 취소
-            }
-
-            document.getElementById('selectedPath').value = data.folder_id;
-
-            const fullPathResponse = await fetch('/get_full_path_name', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ folder_id: data.folder_id })
-            });
-
-            const fullPathData = await fullPathResponse.json();
-            if (fullPathData.full_path_name) {
-                document.getElementById('selectedPathDisplay').value = fullPathData.full_path_name;
-            }
-        } else {
-            alert('Failed to get folder ID');
+        if (job.status === 'done' || job.status === 'failed' || (job.status === 'queued' && job.error)) {
+            return job;
         }
-    } catch (error) {
-        console.error('Error getting folder ID:', error);
-        alert('An error occurred while getting the folder ID');
-    } finally {
-        loadingIcon.style.display = 'none'; // 작업 완료 후 로딩 아이콘 숨기기
+        await new Promise(resolve => setTimeout(resolve, interval));
     }
 }
 
-// 작업 목록 불러오기
-async function fetchTasks() {
+function formatBulkAddProgress(job) {
+    const total = job.progress.total || 0;
+    const summary = job.progress.summary || {};
+    const failed = (summary.failed || 0) + (summary.invalid || 0);
+    const text = `${job.items.length} / ${total} processed` +
+        (summary.added ? `, ${summary.added} added` : '') +
+        (summary.duplicate || summary.existing ? `, ${(summary.duplicate || 0) + (summary.existing || 0)} skipped` : '') +
+        (failed ? `, ${failed} failed` : '');
+    return job.status === 'queued' && job.error ? `${text} (${job.error})` : text;
+}
+
+// 폴더 선택 확인: 
+//  - 탐색 중인 폴더(currentFolder)의 ID를 selectedPath에, 경로를 selectedPathDisplay에 업데이트.
+function confirmSelection() {
+    // 루트 폴더가 선택되었는지 확인
+    if (currentFolder.id === '0') {
+        alert("Root folder cannot be selected.");
+        return; // 선택 취소
+    }
+
+    document.getElementById('selectedPath').value = currentFolder.id;
+    document.getElementById('selectedPathDisplay').value = currentFolder.path;
+}
+
+// 작업 목록 불러오기 (refresh가 true면 서버에 즉시 재조회를 요청)
+async function fetchTasks(refresh = false) {
     const refreshLoadingIcon = document.getElementById('refreshLoadingIcon');
     refreshLoadingIcon.style.display = 'inline-block'; // 로딩 아이콘 표시
 
-    const response = await fetch('/tasks'); // /tasks 경로로 GET요청을 보내 현재 작업 목록을 가져와 화면에 표시
+    // /tasks는 서버가 주기적으로 갱신하는 스냅샷을 반환, /tasks/refresh는 115에서 새로 조회한 결과를 반환
+    const response = refresh === true ? await fetch('/tasks/refresh', { method: 'POST' }) : await fetch('/tasks');
     const data = await response.json();
 
-    console.log("Fetched task data:", data);  // 추가된 디버깅 로그
+    setTasks(data); // 모델만 교체하고, 바뀐 행만 다시 그림
+    refreshLoadingIcon.style.display = 'none'; // 작업 완료 후 로딩 아이콘 숨기기
+}
+
+// 작업 목록 변경분 구독: /tasks/stream으로 처음에 전체 목록(snapshot), 이후에는 바뀐 작업(delta)만 받음
+let taskStreamVersion = 0;
+let taskStream = null;
 
-    const tasks = data.tasks;
-    const runningCount = data.running_count;
-    const completeCount = data.complete_count;
-    
-    const tasksList = document.getElementById('tasks');
-    tasksList.innerHTML = '';
-    
-    document.getElementById('runningCount').textContent = runningCount;
-    document.getElementById('completeCount').textContent = completeCount;
-
-    tasks.forEach(task => {
-        const tr = document.createElement('tr');
-        const statusClass = task.status === 'Complete' ? 'complete' : 'running';
-        
-        tr.innerHTML = `
-            <td class="${statusClass}" style="width: 30%;">${task.name}</td>
-            <td class="${statusClass}">${task.status}</td>
-            <td class="${statusClass}" style="font-size: smaller;">${task.created_time}${task.completed_time ? `<br>${task.completed_time}` : ''}</td>
-            <td class="${statusClass}">${task.size}</td>
-            <td>
-                <div class="progress progress-bar-container">
-                    <div class="progress-bar ${task.status === 'Complete' ? 'bg-secondary text-white' : 'bg-warning'}" role="progressbar" style="width: ${task.percent}%" aria-valuenow="${task.percent}" aria-valuemin="0" aria-valuemax="100">
-                        <span>${task.percent}%</span>
-                    </div>
-                </div>
-            </td>
-            <td class="${statusClass}" style="white-space: pre-wrap; font-size: smaller;">${task.folder_name || 'N/A'}</td>
-            <td>
-                <button class="btn btn-secondary btn-sm" onclick="showRemoveOptions('${task.task_id}')">Remove</button>
-            </td>
-        `;
-        
-        tasksList.appendChild(tr);
+function startTaskStream() {
+    const source = new EventSource('/tasks/stream');
+    taskStream = source;
+
+    source.addEventListener('snapshot', event => {
+        taskStreamVersion = Number(event.lastEventId) || 0;
+        setTasks(JSON.parse(event.data));
     });
-    refreshLoadingIcon.style.display = 'none'; // 작업 완료 후 로딩 아이콘 숨기기
+
+    source.addEventListener('delta', event => {
+        const version = Number(event.lastEventId) || 0;
+        if (version <= taskStreamVersion) {
+            return; // 이미 반영된 스냅샷보다 오래된 변경분은 무시
+        }
+        taskStreamVersion = version;
+        applyTaskDelta(JSON.parse(event.data));
+    });
+
+    // 연결이 끊어지면 EventSource가 자동으로 재연결하고, 서버는 다시 전체 목록을 보냄
+    source.onerror = error => console.warn('Task stream disconnected, retrying...', error);
+}
+
+// 작업(job)이 끝난 뒤 목록 동기화: 서버가 스냅샷을 갱신하면 변경분이 스트림으로 오므로,
+// 스트림이 끊긴 경우에만 /tasks를 다시 받음 (115 재조회 없이, 바뀐 행만 다시 그림)
+async function syncTasksAfterJob(job) {
+    const deleted = (job.items || []).filter(item => item.status === 'deleted' || item.status === 'not_found').map(item => item.task_id);
+    if (deleted.length > 0) {
+        removeTasks(deleted);
+    }
+    if (!taskStream || taskStream.readyState !== EventSource.OPEN) {
+        await fetchTasks();
+    }
 }
 
 async function clearCompletedTasks() {
     const clearLoadingIcon = document.getElementById('clearLoadingIcon');
     clearLoadingIcon.style.display = 'inline-block'; // 로딩 아이콘 표시
 
-    await fetch('/tasks/clear_completed', { method: 'POST' });
-    fetchTasks();
+    const response = await fetch('/tasks/clear_completed', { method: 'POST' });
+    const { job_id } = await response.json();
+    const job = await waitForJob(job_id);
+    await syncTasksAfterJob(job);
 
     clearLoadingIcon.style.display = 'none'; // 작업 완료 후 로딩 아이콘 숨기기
 }
@@ -292,7 +355,9 @@ function removeTask(taskId, action) {
     const endpoint = action === 'delete_task_and_folder' ? `/tasks/${taskId}/delete_with_folder` : `/tasks/${taskId}`;
 
     fetch(endpoint, { method: 'DELETE' })
-        .then(() => fetchTasks()) // 작업 목록을 다시 불러옴
+        .then(response => response.json())
+        .then(({ job_id }) => waitForJob(job_id)) // 작업 큐에서 삭제가 끝날 때까지 대기
+        .then(job => syncTasksAfterJob(job)) // 삭제된 행만 목록에서 제거
         .catch(error => console.error('Error removing task:', error));
         //.finally(() => {
         //    removeLoadingIcon.style.display = 'none'; // 작업 완료 후 로딩 아이콘 숨기기
@@ -0,0 +1,341 @@
+// 작업 목록 테이블 블럭 ----------------------------------------------------------
+// 작업 목록을 메모리 모델(taskModel)에 task_id별로 보관하고, 정렬/필터 결과 중 화면에 보이는 구간의 행만 그립니다.
+//  - 스냅샷/변경분은 모델만 갱신하고, 내용이 바뀐 행만 다시 채움 (행은 task_id로 재사용)
+//  - 스크롤 위치에 맞춰 보이는 행 + 여유분(TASK_OVERSCAN)만 DOM에 두고, 나머지 높이는 위/아래 여백 행으로 채움
+//  - 정렬 기준이나 필터 결과에 영향이 없는 변경(진행률 등)은 순서를 건드리지 않고, 영향이 있는 작업이 적으면
+//    전체를 다시 정렬하지 않고 그 작업만 빼서 이진 탐색으로 다시 끼워 넣음
+//  - 그리기는 requestAnimationFrame으로 모아서 프레임당 한 번만 수행
+
+const TASK_ROW_HEIGHT = 44; // 행 높이(px) 기본값, styles.css의 .task-row 높이. 처음 그린 행의 실제 높이로 보정
+const TASK_OVERSCAN = 10; // 보이는 구간 위/아래로 미리 그려 둘 행 수
+const TASK_COLUMNS = 7;
+const TASK_REORDER_LIMIT = 100; // 순서가 바뀐 작업이 이보다 많으면 전체를 다시 정렬
+
+const SIZE_UNITS = { B: 1, KB: 1024, MB: 1024 ** 2, GB: 1024 ** 3, TB: 1024 ** 4 };
+
+const taskModel = {
+    rows: new Map(), // {task_id: 작업 행}
+    keys: new Map(), // {task_id: 정렬/필터용으로 미리 계산한 값}
+    order: [], // 정렬/필터를 적용한 task_id 목록 (화면 순서)
+    sortKey: 'created_time',
+    sortDir: -1, // 1: 오름차순, -1: 내림차순
+    filterText: '',
+    filterStatus: '',
+};
+
+const taskView = {
+    tbody: null,
+    viewport: null,
+    topSpacer: null,
+    bottomSpacer: null,
+    rendered: new Map(), // {task_id: 현재 DOM에 있는 tr}
+    rowHeight: TASK_ROW_HEIGHT,
+    rowMeasured: false,
+    orderDirty: false, // order 전체를 다시 계산해야 하는지
+    moved: new Set(), // 추가/삭제되었거나 정렬 값/필터 결과가 바뀌었을 수 있는 task_id
+    frame: null,
+};
+
+// 모델 ---------------------------------------------------------------------------
+function parseSize(size) {
+    const match = /^([\d.]+)\s*([KMGT]?B)$/.exec(size || '');
+    return match ? parseFloat(match[1]) * SIZE_UNITS[match[2]] : 0;
+}
+
+function taskKeys(task) {
+    return {
+        name: (task.name || '').toLowerCase(),
+        status: task.status || '',
+        created_time: task.created_time || '',
+        size: parseSize(task.size),
+        percent: parseFloat(task.percent) || 0,
+        folder_name: (task.folder_name || '').toLowerCase(),
+        search: `${task.name || ''}\n${task.folder_name || ''}\n${task.account || ''}`.toLowerCase(),
+    };
+}
+
+function sameTask(a, b) {
+    if (a === b) {
+        return true;
+    }
+    if (!a || !b) {
+        return false;
+    }
+    const keys = Object.keys(b);
+    return keys.length === Object.keys(a).length && keys.every(key => a[key] === b[key]);
+}
+
+function matchesFilter(taskId) {
+    const keys = taskModel.keys.get(taskId);
+    return (!taskModel.filterStatus || keys.status === taskModel.filterStatus) &&
+        (!taskModel.filterText || keys.search.includes(taskModel.filterText));
+}
+
+function compareTasks(a, b) {
+    if (a.key !== b.key) {
+        return (a.key < b.key ? -1 : 1) * taskModel.sortDir;
+    }
+    return a.id < b.id ? -1 : a.id > b.id ? 1 : 0; // 같으면 task_id 순서로 고정
+}
+
+// 작업 한 건을 모델에 반영하고, 화면 순서에 영향이 있으면 moved에 기록
+function upsertTask(task) {
+    const previous = taskModel.rows.get(task.task_id);
+    if (sameTask(previous, task)) {
+        return;
+    }
+    const keys = taskKeys(task);
+    const oldKeys = taskModel.keys.get(task.task_id);
+    taskModel.rows.set(task.task_id, task); // 새 객체이므로 DOM에 있는 행은 다음 그리기에서 다시 채워짐
+    taskModel.keys.set(task.task_id, keys);
+    if (!oldKeys || oldKeys[taskModel.sortKey] !== keys[taskModel.sortKey] ||
+        oldKeys.status !== keys.status || oldKeys.search !== keys.search) {
+        taskView.moved.add(task.task_id);
+    }
+}
+
+function removeTaskFromModel(taskId) {
+    if (taskModel.rows.delete(taskId)) {
+        taskModel.keys.delete(taskId);
+        taskView.moved.add(taskId);
+    }
+}
+
+// 전체 목록(snapshot, /tasks 응답)으로 모델을 교체. 내용이 같은 작업은 기존 행을 그대로 사용
+function setTasks(data) {
+    const seen = new Set();
+    data.tasks.forEach(task => {
+        seen.add(task.task_id);
+        upsertTask(task);
+    });
+    Array.from(taskModel.rows.keys()).forEach(taskId => {
+        if (!seen.has(taskId)) {
+            removeTaskFromModel(taskId);
+        }
+    });
+    updateTaskCounts(data);
+    scheduleTaskRender();
+}
+
+// 변경분(delta)만 모델에 반영
+function applyTaskDelta(delta) {
+    delta.removed.forEach(removeTaskFromModel);
+    delta.changed.forEach(upsertTask);
+    updateTaskCounts(delta);
+    scheduleTaskRender();
+}
+
+// 삭제 작업(job)이 끝난 작업을 서버의 변경분을 기다리지 않고 바로 목록에서 제거
+function removeTasks(taskIds) {
+    taskIds.forEach(removeTaskFromModel);
+    scheduleTaskRender();
+}
+
+// 정렬 값을 미리 꺼내 두고 정렬 (비교할 때마다 Map을 조회하지 않음)
+function rebuildTaskOrder() {
+    const entries = [];
+    taskModel.keys.forEach((keys, taskId) => {
+        if (matchesFilter(taskId)) {
+            entries.push({ id: taskId, key: keys[taskModel.sortKey] });
+        }
+    });
+    taskModel.order = entries.sort(compareTasks).map(entry => entry.id);
+}
+
+// moved에 있는 작업만 order에서 빼고, 남아 있고 필터에 맞는 작업은 정렬 위치를 이진 탐색으로 찾아 다시 넣음
+function updateTaskOrder(moved) {
+    const order = taskModel.order.filter(taskId => !moved.has(taskId));
+    moved.forEach(taskId => {
+        const keys = taskModel.keys.get(taskId);
+        if (!keys || !matchesFilter(taskId)) {
+            return;
+        }
+        const entry = { id: taskId, key: keys[taskModel.sortKey] };
+        let low = 0;
+        let high = order.length;
+        while (low < high) {
+            const mid = (low + high) >>> 1;
+            if (compareTasks({ id: order[mid], key: taskModel.keys.get(order[mid])[taskModel.sortKey] }, entry) < 0) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        order.splice(low, 0, taskId);
+    });
+    taskModel.order = order;
+}
+
+function updateTaskCounts(data) {
+    document.getElementById('runningCount').textContent = data.running_count;
+    document.getElementById('completeCount').textContent = data.complete_count;
+}
+
+// 정렬/필터 ----------------------------------------------------------------------
+function sortTasksBy(key) {
+    if (taskModel.sortKey === key) {
+        taskModel.sortDir = -taskModel.sortDir;
+    } else {
+        taskModel.sortKey = key;
+        taskModel.sortDir = key === 'name' || key === 'folder_name' ? 1 : -1;
+    }
+    document.querySelectorAll('#taskTableHead th[data-sort]').forEach(th => {
+        th.classList.toggle('sort-asc', th.dataset.sort === key && taskModel.sortDir === 1);
+        th.classList.toggle('sort-desc', th.dataset.sort === key && taskModel.sortDir === -1);
+    });
+    scheduleTaskRender(true);
+}
+
+function filterTasks() {
+    taskModel.filterText = document.getElementById('taskFilter').value.trim().toLowerCase();
+    taskModel.filterStatus = document.getElementById('taskStatusFilter').value;
+    taskView.viewport.scrollTop = 0;
+    scheduleTaskRender(true);
+}
+
+// 그리기 -------------------------------------------------------------------------
+function scheduleTaskRender(orderDirty = false) { // orderDirty: 정렬 기준/필터가 바뀌어 전체를 다시 정렬
+    taskView.orderDirty = taskView.orderDirty || orderDirty;
+    if (taskView.frame === null) {
+        taskView.frame = requestAnimationFrame(renderTaskWindow);
+    }
+}
+
+function createSpacerRow() {
+    const tr = document.createElement('tr');
+    tr.className = 'task-spacer';
+    tr.innerHTML = `<td colspan="${TASK_COLUMNS}"></td>`;
+    return tr;
+}
+
+// 행의 셀 구조는 처음 한 번만 만들고, 이후에는 바뀐 값만 채움 (작업 이름 등은 textContent로 넣음)
+function createTaskRow() {
+    const tr = document.createElement('tr');
+    tr.className = 'task-row';
+    tr.innerHTML = `
+        <td class="task-name"></td>
+        <td class="task-status"></td>
+        <td class="task-time"><div></div><div></div></td>
+        <td class="task-size"></td>
+        <td>
+            <div class="progress progress-bar-container">
+                <div class="progress-bar" role="progressbar" aria-valuemin="0" aria-valuemax="100"><span></span></div>
+            </div>
+        </td>
+        <td class="task-folder"></td>
+        <td><button class="btn btn-secondary btn-sm" data-action="remove">Remove</button></td>
+    `;
+    return tr;
+}
+
+function fillTaskRow(tr, task) {
+    const complete = task.status === 'Complete';
+    const cells = tr.cells;
+    tr.dataset.taskId = task.task_id;
+    tr.classList.toggle('complete', complete);
+    tr.classList.toggle('running', !complete);
+
+    cells[0].textContent = task.name;
+    cells[0].title = task.name;
+    cells[1].textContent = task.status;
+    cells[2].firstChild.textContent = task.created_time;
+    cells[2].lastChild.textContent = task.completed_time || '';
+    cells[3].textContent = task.size;
+
+    const bar = cells[4].querySelector('.progress-bar');
+    bar.className = `progress-bar ${complete ? 'bg-secondary text-white' : 'bg-warning'}`;
+    bar.style.width = `${task.percent}%`;
+    bar.setAttribute('aria-valuenow', task.percent);
+    bar.firstChild.textContent = `${task.percent}%`;
+
+    const folder = task.account ? `${task.folder_name || 'N/A'} (${task.account})` : (task.folder_name || 'N/A');
+    cells[5].textContent = folder;
+    cells[5].title = folder;
+    tr.task = task;
+}
+
+// 스크롤 위치에서 보이는 구간을 계산하고, 그 구간의 행만 DOM에 남김
+function renderTaskWindow() {
+    taskView.frame = null;
+    if (taskView.orderDirty || taskView.moved.size > TASK_REORDER_LIMIT) {
+        rebuildTaskOrder();
+    } else if (taskView.moved.size > 0) {
+        updateTaskOrder(taskView.moved);
+    }
+    taskView.orderDirty = false;
+    taskView.moved = new Set();
+
+    const order = taskModel.order;
+    const rowHeight = taskView.rowHeight;
+    const viewportHeight = taskView.viewport.clientHeight || rowHeight * 20;
+    const first = Math.max(0, Math.floor(taskView.viewport.scrollTop / rowHeight) - TASK_OVERSCAN);
+    const last = Math.min(order.length, first + Math.ceil(viewportHeight / rowHeight) + 2 * TASK_OVERSCAN);
+    const visible = order.slice(first, last);
+    const visibleIds = new Set(visible);
+
+    // 구간을 벗어난 행 제거
+    taskView.rendered.forEach((tr, taskId) => {
+        if (!visibleIds.has(taskId)) {
+            tr.remove();
+            taskView.rendered.delete(taskId);
+        }
+    });
+
+    // 구간의 행을 순서대로 배치: 있는 행은 재사용하고, 바뀐 행만 다시 채움
+    let cursor = taskView.topSpacer.nextSibling;
+    visible.forEach(taskId => {
+        const task = taskModel.rows.get(taskId);
+        let tr = taskView.rendered.get(taskId);
+        if (!tr) {
+            tr = createTaskRow();
+            taskView.rendered.set(taskId, tr);
+        }
+        if (tr.task !== task) {
+            fillTaskRow(tr, task);
+        }
+        if (tr === cursor) {
+            cursor = cursor.nextSibling;
+        } else {
+            taskView.tbody.insertBefore(tr, cursor);
+        }
+    });
+
+    taskView.topSpacer.firstChild.style.height = `${first * rowHeight}px`;
+    taskView.bottomSpacer.firstChild.style.height = `${(order.length - last) * rowHeight}px`;
+    document.getElementById('taskShownCount').textContent =
+        order.length === taskModel.rows.size ? `${order.length}` : `${order.length} / ${taskModel.rows.size}`;
+
+    // 처음 그린 행의 실제 높이(테두리 포함)로 한 번만 보정
+    if (!taskView.rowMeasured && visible.length > 0) {
+        taskView.rowMeasured = true;
+        const measured = taskView.rendered.get(visible[0]).offsetHeight;
+        if (measured && measured !== rowHeight) {
+            taskView.rowHeight = measured;
+            scheduleTaskRender();
+        }
+    }
+}
+
+function initTaskTable() {
+    taskView.tbody = document.getElementById('tasks');
+    taskView.viewport = document.getElementById('taskViewport');
+    taskView.topSpacer = createSpacerRow();
+    taskView.bottomSpacer = createSpacerRow();
+    taskView.tbody.append(taskView.topSpacer, taskView.bottomSpacer);
+
+    taskView.viewport.addEventListener('scroll', () => scheduleTaskRender(), { passive: true });
+    window.addEventListener('resize', () => scheduleTaskRender());
+
+    // Remove 버튼은 행마다 핸들러를 달지 않고 tbody에서 한 번에 처리
+    taskView.tbody.addEventListener('click', event => {
+        const button = event.target.closest('button[data-action="remove"]');
+        if (button) {
+            showRemoveOptions(button.closest('tr').dataset.taskId);
+        }
+    });
+    document.querySelectorAll('#taskTableHead th[data-sort]').forEach(th => {
+        th.addEventListener('click', () => sortTasksBy(th.dataset.sort));
+    });
+    document.getElementById('taskFilter').addEventListener('input', filterTasks);
+    document.getElementById('taskStatusFilter').addEventListener('change', filterTasks);
+}
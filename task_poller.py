@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+
+# 작업 목록 스냅샷 블럭 ---------------------------------------------------------
+# 115 오프라인 목록은 백그라운드 스레드가 주기적으로 한 번만 조회하고,
+# 가공된 결과를 불변 스냅샷으로 보관합니다. /tasks 요청은 이 스냅샷을 그대로 반환합니다.
+
+# upstream: {task_id: 115가 돌려준 원본 작업 dict} (file_id, wp_path_id, status 등을 다시 조회하지 않고 사용)
+TaskSnapshot = namedtuple('TaskSnapshot', ['version', 'tasks', 'running_count', 'complete_count', 'updated_at', 'payload', 'upstream'])
+
+
+def make_snapshot(version, tasks, running_count, complete_count, upstream=None, updated_at=None):
+    """ 응답 본문(JSON)까지 미리 직렬화해 둔 스냅샷을 만듭니다. """
+    tasks = tuple(tasks)
+    payload = json.dumps({'tasks': tasks, 'running_count': running_count, 'complete_count': complete_count},
+                         ensure_ascii=False, default=str)
+    return TaskSnapshot(version, tasks, running_count, complete_count, updated_at or time.time(), payload, upstream or {})
+
+
+def save_snapshot(snapshot, file_path):
+    """ 재시작 직후 바로 응답할 수 있도록 스냅샷을 파일에 저장합니다. (임시 파일에 쓴 뒤 교체) """
+    data = {'version': snapshot.version, 'updated_at': snapshot.updated_at, 'tasks': snapshot.tasks,
+            'running_count': snapshot.running_count, 'complete_count': snapshot.complete_count,
+            'upstream': snapshot.upstream}
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'), default=str)
+    os.replace(tmp_path, file_path)
+
+
+def load_snapshot(file_path):
+    """ 저장된 스냅샷을 읽습니다. 파일이 없거나 읽을 수 없으면 None. """
+    if not os.path.exists(file_path):
+        return None
+    try:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        return make_snapshot(data['version'], data['tasks'], data['running_count'], data['complete_count'],
+                             data.get('upstream'), data.get('updated_at'))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.error(f"Failed to load task snapshot from {file_path}: {e}")
+        return None
+
+
+EMPTY_SNAPSHOT = make_snapshot(0, (), 0, 0)
+
+
+def diff_snapshots(old, new):
+    """ 두 스냅샷 사이에서 바뀐(추가 포함) 작업 행과 사라진 task_id 목록을 계산합니다. """
+    old_rows = {task['task_id']: task for task in old.tasks}
+    changed = []
+    for task in new.tasks:
+        if old_rows.pop(task['task_id'], None) != task:
+            changed.append(task)
+    return {
+        'version': new.version,
+        'changed': changed,
+        'removed': list(old_rows),
+        'running_count': new.running_count,
+        'complete_count': new.complete_count,
+    }
+
+
+class TaskPoller:
+    def __init__(self, refresh_fn, interval):
+        """ refresh_fn(previous_snapshot) -> 새 TaskSnapshot. interval은 초 단위 갱신 주기. """
+        self.refresh_fn = refresh_fn
+        self.interval = interval
+        self._snapshot = EMPTY_SNAPSHOT
+        self._seeded = False  # 저장된 스냅샷으로 시작했는지 여부
+        self.last_refresh = None  # 마지막으로 115 조회에 성공한 시각
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._started_polls = 0  # 시작된 조회 횟수
+        self._finished_polls = 0  # 완료된 조회 중 마지막 번호
+        self._thread = None
+        self._listeners = []
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def live(self):
+        """ 이번 실행에서 115 조회에 한 번 이상 성공했는지 여부. """
+        return self.last_refresh is not None
+
+    def seed(self, snapshot):
+        """ 첫 조회 전까지 응답할 스냅샷(재시작 전에 저장된 스냅샷)을 지정합니다. """
+        with self._cond:
+            if self._finished_polls == 0:
+                self._snapshot = snapshot
+                self._seeded = True
+                self._cond.notify_all()
+
+    def start(self):
+        if self._thread is None:
+            self._wake.set()  # 시작하자마자 첫 조회를 수행
+            self._thread = threading.Thread(target=self._run, name='task-poller', daemon=True)
+            self._thread.start()
+        return self
+
+    def add_listener(self, listener):
+        """ 새 스냅샷이 발행될 때마다 listener(old, new)를 폴러 스레드에서 호출합니다. """
+        self._listeners.append(listener)
+
+    def wait_ready(self, timeout=60):
+        """ 첫 조회가 끝날 때까지(최대 timeout초) 기다린 뒤 현재 스냅샷을 반환합니다. 저장된 스냅샷이 있으면 바로 반환. """
+        with self._cond:
+            self._cond.wait_for(lambda: self._finished_polls >= 1 or self._seeded, timeout)
+            return self._snapshot
+
+    def wait_first_poll(self, timeout=60):
+        """ 저장된 스냅샷과 관계없이 이번 실행의 첫 조회(성공/실패)가 끝날 때까지 기다립니다. """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._finished_polls >= 1, timeout)
+
+    def refresh_now(self, wait=True, timeout=60):
+        """ 즉시 갱신을 요청합니다. wait=True면 요청 이후 시작된 조회가 끝날 때까지 기다립니다.
+            동시에 들어온 요청들은 같은 조회 결과를 공유합니다. """
+        with self._cond:
+            target = self._started_polls + 1
+            self._wake.set()
+            if wait:
+                self._cond.wait_for(lambda: self._finished_polls >= target, timeout)
+            return self._snapshot
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+            with self._cond:
+                self._started_polls += 1
+                poll_number = self._started_polls
+
+            snapshot = None
+            try:
+                snapshot = self.refresh_fn(self._snapshot)
+            except Exception as e:
+                logging.error(f"Error refreshing task snapshot: {e}")
+
+            previous = self._snapshot
+            with self._cond:
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                    self.last_refresh = time.time()
+                self._finished_polls = poll_number
+                self._cond.notify_all()
+
+            if snapshot is not None:
+                for listener in self._listeners:
+                    try:
+                        listener(previous, snapshot)
+                    except Exception as e:
+                        logging.error(f"Error in task snapshot listener: {e}")
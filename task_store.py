@@ -0,0 +1,138 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# task_times 저장소 블럭 ---------------------------------------------------------
+# info_hash를 키로 하는 SQLite(WAL) 저장소. 기존 task_times.json의 전체 로드/재작성 대신
+# 행 단위 upsert/delete를 수행하고, 여러 건의 쓰기는 하나의 트랜잭션으로 묶습니다.
+
+MAX_QUERY_PARAMS = 500  # 한 번의 IN (...) 조회에 넣을 최대 id 수 (SQLite 변수 개수 제한보다 작게)
+TASK_FIELDS = ('created_time', 'completed_time', 'folder_id', 'original_size', 'account')
+
+
+class TaskStore:
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._depth = 0  # batch() 중첩 깊이
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                info_hash TEXT PRIMARY KEY,
+                created_time TEXT,
+                completed_time TEXT,
+                folder_id TEXT,
+                original_size TEXT,
+                account TEXT
+            )
+        ''')
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(tasks)')}
+        if 'account' not in columns:  # 이전 버전의 저장소: 작업이 있는 계정 이름 열 추가 (기존 레코드는 다음 조회 때 채워짐)
+            self._conn.execute('ALTER TABLE tasks ADD COLUMN account TEXT')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+        if legacy_json_path:
+            self.migrate_from_json(legacy_json_path)
+
+    @staticmethod
+    def _row_to_dict(row):
+        """ 기존 task_times.json과 같은 모양(값이 있는 키만 포함)으로 변환합니다. """
+        return {key: row[key] for key in TASK_FIELDS if row[key] is not None}
+
+    @contextmanager
+    def batch(self):
+        """ 블럭 안의 모든 쓰기를 하나의 트랜잭션으로 커밋합니다. 중첩 호출 가능. """
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute('BEGIN IMMEDIATE')
+            self._depth += 1
+            try:
+                yield self
+            except Exception:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute('ROLLBACK')
+                raise
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute('COMMIT')
+
+    def get(self, task_id):
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM tasks WHERE info_hash = ?', (task_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def get_many(self, task_ids):
+        """ 주어진 task_id들의 레코드만 {info_hash: {...}} 형태로 반환합니다. (저장소에 없는 id는 빠짐) """
+        task_ids = list(dict.fromkeys(task_ids))
+        records = {}
+        with self._lock:
+            for i in range(0, len(task_ids), MAX_QUERY_PARAMS):
+                chunk = task_ids[i:i + MAX_QUERY_PARAMS]
+                rows = self._conn.execute(
+                    f"SELECT * FROM tasks WHERE info_hash IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                records.update((row['info_hash'], self._row_to_dict(row)) for row in rows)
+        return records
+
+    def get_all(self):
+        """ {info_hash: {...}} 형태로 전체 레코드를 반환합니다. """
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM tasks').fetchall()
+        return {row['info_hash']: self._row_to_dict(row) for row in rows}
+
+    def __contains__(self, task_id):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM tasks WHERE info_hash = ?', (task_id,)).fetchone() is not None
+
+    def upsert(self, task_id, times):
+        """ 주어진 필드만 갱신합니다. 전달되지 않은 필드는 기존 값을 유지합니다. """
+        self.upsert_many({task_id: times})
+
+    def upsert_many(self, task_times):
+        with self.batch():
+            for task_id, times in task_times.items():
+                values = {key: times[key] for key in TASK_FIELDS if key in times}
+                columns = ', '.join(['info_hash', *values])
+                placeholders = ', '.join('?' * (len(values) + 1))
+                updates = ', '.join(f"{key} = excluded.{key}" for key in values) or 'info_hash = info_hash'
+                self._conn.execute(
+                    f"INSERT INTO tasks ({columns}) VALUES ({placeholders}) "
+                    f"ON CONFLICT(info_hash) DO UPDATE SET {updates}",
+                    (task_id, *(None if v is None else str(v) for v in values.values()))
+                )
+
+    def delete(self, task_id):
+        self.delete_many([task_id])
+
+    def delete_many(self, task_ids):
+        """ 실제로 삭제된(저장소에 있던) task_id 목록을 반환합니다. """
+        with self.batch():
+            return [task_id for task_id in task_ids
+                    if self._conn.execute('DELETE FROM tasks WHERE info_hash = ?', (task_id,)).rowcount]
+
+    def migrate_from_json(self, json_path):
+        """ 기존 task_times.json을 1회만 가져옵니다. (meta 테이블에 완료 여부 기록) """
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+            if done or not os.path.exists(json_path):
+                return
+
+            try:
+                with open(json_path, 'r') as f:
+                    legacy = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.error(f"Failed to read legacy task times from {json_path}: {e}")
+                return
+
+            with self.batch():
+                self.upsert_many(legacy)
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (json_path,))
+            logging.info(f"Migrated {len(legacy)} task records from {json_path} to {self.db_path}")
@@ -0,0 +1,162 @@
+import json
+import base64
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+# 작업 목록 조회 블럭 -----------------------------------------------------------
+# 스냅샷 위에 정렬 키별 인덱스를 만들어 /tasks의 필터/정렬/커서 페이지네이션을 처리합니다.
+# 인덱스는 스냅샷마다 한 번, 처음 사용되는 정렬 키(와 상태)에 대해서만 만들어지고,
+# 요청은 커서 위치를 이진 탐색한 뒤 페이지 크기만큼만 읽습니다.
+
+SORT_KEYS = ('created_time', 'completed_time', 'name', 'size', 'percent', 'folder_name')
+SLIM_FIELDS = ('task_id', 'name', 'status', 'created_time', 'completed_time', 'size', 'percent', 'folder_name', 'account')
+MAX_LIMIT = 500
+FORMATS = ('rows', 'columns')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class InvalidQuery(ValueError):
+    """ 잘못된 정렬 키, 커서, 날짜 등. """
+
+
+def encode_cursor(sort_value, task_id):
+    return base64.urlsafe_b64encode(json.dumps([sort_value, task_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, task_id
+    except (ValueError, TypeError):
+        raise InvalidQuery('Invalid cursor')
+
+
+def normalize_time(value, end_of_day=False):
+    """ 'YYYY-MM-DD' 또는 ISO 형식의 시각을 작업 행의 시간 형식('%Y-%m-%d %H:%M:%S')으로 바꿉니다. """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidQuery(f"Invalid time: {value}")
+    if end_of_day and len(value) <= 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _epoch(value):
+    return int(datetime.strptime(value, TIME_FORMAT).timestamp()) if value else None
+
+
+def to_columns(snapshot, tasks, fields=SLIM_FIELDS):
+    """ 작업 행 목록을 {'columns': [...], 'rows': [[...], ...]} 형식으로 바꿉니다.
+        키를 행마다 반복하지 않고, 표시용 문자열 대신 원래 값(시간은 epoch 초, size는 바이트, percent는 숫자)을 담습니다. """
+    def value(task, field):
+        if field in ('created_time', 'completed_time'):
+            return _epoch(task[field])
+        if field == 'size':
+            return int(float(snapshot.upstream.get(task['task_id'], {}).get('size', 0) or 0))
+        if field == 'percent':
+            return float(task['percent'])
+        return task.get(field)  # 계정 정보가 없던 이전 스냅샷의 행은 account가 없음
+
+    return {'columns': list(fields), 'rows': [[value(task, field) for field in fields] for task in tasks]}
+
+
+class TaskView:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._rows = {task['task_id']: task for task in snapshot.tasks}
+        self._indexes = {}  # {(sort_key, status): [(sort_value, task_id), ...] 오름차순}
+
+    def _sort_value(self, task, sort_key):
+        if sort_key == 'size':
+            return int(float(self.snapshot.upstream.get(task['task_id'], {}).get('size', 0) or 0))
+        if sort_key == 'percent':
+            return float(task['percent'])
+        if sort_key in ('name', 'folder_name'):
+            return (task[sort_key] or '').lower()
+        return task[sort_key] or ''
+
+    def _index(self, sort_key, status):
+        key = (sort_key, status)
+        if key not in self._indexes:
+            self._indexes[key] = sorted(
+                (self._sort_value(task, sort_key), task['task_id'])
+                for task in self.snapshot.tasks if status is None or task['status'] == status
+            )
+        return self._indexes[key]
+
+    def query(self, status=None, folder=None, folder_id=None, account=None, q=None, since=None, until=None,
+              sort='created_time', order='desc', limit=50, cursor=None, fields=None, format='rows'):
+        """ status: Running/Complete, folder: 저장 폴더 경로, folder_id: 저장 폴더 ID, account: 계정 이름, q: 이름 부분 문자열,
+            since/until: 생성 시각 범위, sort/order: 정렬, cursor: 이전 응답의 next_cursor,
+            format: rows(작업별 객체) 또는 columns(to_columns 형식) """
+        if format not in FORMATS:
+            raise InvalidQuery(f"Invalid format: {format}")
+        if sort not in SORT_KEYS:
+            raise InvalidQuery(f"Invalid sort key: {sort}")
+        if status:
+            status = status.capitalize()
+            if status not in ('Running', 'Complete'):
+                raise InvalidQuery(f"Invalid status: {status}")
+        if order not in ('asc', 'desc'):
+            raise InvalidQuery(f"Invalid order: {order}")
+        try:
+            limit = max(1, min(int(limit), MAX_LIMIT))
+        except (TypeError, ValueError):
+            raise InvalidQuery(f"Invalid limit: {limit}")
+        fields = [field for field in (fields or SLIM_FIELDS) if field in SLIM_FIELDS]
+        since = normalize_time(since) if since else None
+        until = normalize_time(until, end_of_day=True) if until else None
+        q = q.lower() if q else None
+
+        index = self._index(sort, status)
+        lo, hi = 0, len(index)
+        if sort == 'created_time':  # 시간 범위는 정렬 키와 같으면 이진 탐색으로 범위를 좁힘
+            if since:
+                lo = bisect_left(index, (since, ''))
+            if until:
+                hi = bisect_right(index, (until, '\uffff'))
+        if cursor:
+            position = tuple(decode_cursor(cursor))
+            if order == 'asc':
+                lo = max(lo, bisect_right(index, position))
+            else:
+                hi = min(hi, bisect_left(index, position))
+
+        positions = range(lo, hi) if order == 'asc' else range(hi - 1, lo - 1, -1)
+        page = []
+        page_last = None
+        next_cursor = None
+        for i in positions:
+            sort_value, task_id = index[i]
+            task = self._rows[task_id]
+            if folder and task['folder_name'] != folder:
+                continue
+            if folder_id and str(self.snapshot.upstream.get(task_id, {}).get('wp_path_id')) != str(folder_id):
+                continue
+            if account and task.get('account') != account:
+                continue
+            if q and q not in task['name'].lower():
+                continue
+            if since and task['created_time'] < since:
+                continue
+            if until and task['created_time'] > until:
+                continue
+            if len(page) == limit:
+                next_cursor = encode_cursor(*index[page_last])
+                break
+            page.append(task)
+            page_last = i
+
+        if format == 'columns':
+            tasks = to_columns(self.snapshot, page, fields)
+        else:
+            tasks = [{field: task.get(field) for field in fields} for task in page]
+        return {
+            'tasks': tasks,
+            'next_cursor': next_cursor,
+            'running_count': self.snapshot.running_count,
+            'complete_count': self.snapshot.complete_count,
+            'version': self.snapshot.version,
+        }
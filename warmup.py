@@ -0,0 +1,103 @@
+import time
+import logging
+import threading
+
+# 시작/준비 상태 블럭 -----------------------------------------------------------
+# 115 클라이언트 생성과 폴더/작업 목록 준비를 import 시점이 아닌 백그라운드 warm-up으로 미룹니다.
+# 서버는 저장된 스냅샷으로 바로 응답을 시작하고, /healthz, /readyz로 준비 상태를 확인할 수 있습니다.
+
+PENDING, RUNNING, READY, FAILED = 'pending', 'running', 'ready', 'failed'
+
+
+class UpstreamUnavailable(Exception):
+    """ 115 클라이언트가 아직 준비되지 않았거나 생성에 실패한 경우. """
+
+
+class LazyResource:
+    """ 처음 사용할 때 factory()로 한 번만 생성합니다. 실패하면 retry_interval초 동안은 다시 시도하지 않고
+        UpstreamUnavailable을 바로 발생시킵니다. (쿠키 오류 등으로 요청마다 115를 호출하지 않도록) """
+
+    def __init__(self, name, factory, retry_interval=30):
+        self.name = name
+        self.factory = factory
+        self.retry_interval = retry_interval
+        self.error = None
+        self._value = None
+        self._retry_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+    def get(self):
+        value = self._value
+        if value is not None:
+            return value
+        with self._lock:
+            if self._value is not None:
+                return self._value
+            if self._retry_at > time.monotonic():
+                raise UpstreamUnavailable(f"{self.name} is not available: {self.error}")
+            try:
+                self._value = self.factory()
+            except Exception as e:
+                self.error = str(e)
+                self._retry_at = time.monotonic() + self.retry_interval
+                logging.error(f"Failed to create {self.name}: {e}")
+                raise UpstreamUnavailable(f"{self.name} is not available: {e}") from e
+            self.error = None
+            logging.info(f"{self.name} created")
+            return self._value
+
+
+class WarmUp:
+    """ steps([(name, fn), ...])를 백그라운드 스레드에서 순서대로 실행합니다.
+        실패한 단계는 retry_interval초(최대 max_interval초까지 두 배씩)마다 다시 시도합니다. """
+
+    def __init__(self, steps, retry_interval=5, max_interval=300):
+        self.steps = steps
+        self.retry_interval = retry_interval
+        self.max_interval = max_interval
+        self.started_at = time.time()
+        self.ready_at = None
+        self._state = {name: {'state': PENDING, 'error': None, 'attempts': 0, 'duration': None} for name, _ in steps}
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.ready_at is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='warm-up', daemon=True)
+            self._thread.start()
+        return self
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'started_at': self.started_at,
+            'ready_at': self.ready_at,
+            'steps': {name: dict(self._state[name]) for name, _ in self.steps},
+        }
+
+    def _run(self):
+        for name, step in self.steps:
+            state = self._state[name]
+            delay = self.retry_interval
+            while True:
+                state.update(state=RUNNING, attempts=state['attempts'] + 1)
+                started = time.monotonic()
+                try:
+                    step()
+                except Exception as e:
+                    state.update(state=FAILED, error=str(e))
+                    logging.warning(f"Warm-up step {name} failed, retrying in {delay}s: {e}")
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_interval)
+                    continue
+                state.update(state=READY, error=None, duration=round(time.monotonic() - started, 3))
+                break
+        self.ready_at = time.time()
+        logging.info(f"Warm-up finished in {self.ready_at - self.started_at:.2f}s")